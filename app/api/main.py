@@ -1,8 +1,25 @@
 from __future__ import annotations
 
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
 
-from app.api.routes import router
+from app.api.routes import get_analyzer, router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Load the rule pack (YAML parse + regex compile) before the first request arrives.
+    app.state.analyzer = get_analyzer()
+    # Bound concurrent CPU-bound /analyze work to the core count; the rest of the
+    # default thread pool stays free for other endpoints.
+    app.state.analyze_limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+    yield
+    # Drop pooled connections; the cached analyzer reopens them if used again.
+    app.state.analyzer.close()
 
 
 def create_app() -> FastAPI:
@@ -10,6 +27,7 @@ def create_app() -> FastAPI:
         title="PhishShield",
         version="0.1.0",
         description="Defensive email analysis engine with explainable risk scoring.",
+        lifespan=lifespan,
     )
     app.include_router(router)
     return app
@@ -3,18 +3,35 @@ from __future__ import annotations
 import os
 from functools import lru_cache
 
-from fastapi import APIRouter
+import anyio.to_thread
+from fastapi import APIRouter, Request, Response
+from pydantic import TypeAdapter
 
 from app.api.schemas import AnalyzeRequest, AnalyzeResponse, RuleSummary
-from app.core.analyzer import Analyzer
+from app.core.analyzer import Analyzer, get_default_analyzer
+from app.core.types import Rule
 
 router = APIRouter()
 
+# /rules is serialized straight from the loaded Rule models, restricted to the
+# RuleSummary fields, so no intermediate RuleSummary objects are built or validated.
+_RULES = TypeAdapter(list[Rule])
+_RULE_SUMMARY_FIELDS = {"__all__": set(RuleSummary.model_fields)}
+
 
 @lru_cache
 def get_analyzer() -> Analyzer:
     pack_path = os.getenv("PHISHSHIELD_RULE_PACK")
-    return Analyzer(rule_pack_path=pack_path)
+    return Analyzer(rule_pack_path=pack_path) if pack_path else get_default_analyzer()
+
+
+def _analyzer(request: Request) -> Analyzer:
+    """
+    Analyzer warmed up by the app lifespan.
+    Falls back to the cached factory when the lifespan did not run (e.g. TestClient without `with`).
+    """
+    analyzer = getattr(request.app.state, "analyzer", None)
+    return analyzer if analyzer is not None else get_analyzer()
 
 
 @router.get("/health")
@@ -22,24 +39,43 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@router.get("/rules", response_model=list[RuleSummary])
-def list_rules() -> list[RuleSummary]:
-    engine_rules = get_analyzer().engine.rules
-    return [
-        RuleSummary(
-            id=r.id,
-            title=r.title,
-            weight=r.weight,
-            severity=r.severity,
-            tags=r.tags,
+def _rules_json(analyzer: Analyzer) -> bytes:
+    """
+    Serialized /rules payload. Rules are immutable once an analyzer is built, so this
+    is computed once and kept on the analyzer itself (a reload builds a fresh one, and
+    a swapped-out analyzer is collected together with its payload).
+    """
+    payload = analyzer.rules_json
+    if payload is None:
+        payload = analyzer.rules_json = _RULES.dump_json(
+            list(analyzer.engine.rules), include=_RULE_SUMMARY_FIELDS
         )
-        for r in engine_rules
-    ]
+    return payload
+
+
+# Returning a Response bypasses response_model serialization; the model only documents
+# the payload (and keeps the OpenAPI schema unchanged).
+@router.get("/rules", response_model=list[RuleSummary])
+def list_rules(request: Request) -> Response:
+    return Response(content=_rules_json(_analyzer(request)), media_type="application/json")
+
+
+# The result is built from trusted engine output, so skip response_model re-validation;
+# `responses` keeps AnalyzeResponse in the OpenAPI schema.
+@router.post("/analyze", response_model=None, responses={200: {"model": AnalyzeResponse}})
+async def analyze(payload: AnalyzeRequest, request: Request) -> Response:
+    # Regex matching is CPU-bound and holds the GIL: run it off the event loop, on a
+    # bounded number of worker threads (limiter set up by the app lifespan).
+    content = await anyio.to_thread.run_sync(
+        _analyze_json,
+        _analyzer(request),
+        payload,
+        limiter=getattr(request.app.state, "analyze_limiter", None),
+    )
+    return Response(content=content, media_type="application/json")
 
 
-@router.post("/analyze", response_model=AnalyzeResponse)
-def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
-    analyzer = get_analyzer()
+def _analyze_json(analyzer: Analyzer, payload: AnalyzeRequest) -> str:
     result = analyzer.analyze(
         subject=payload.subject,
         body=payload.body,
@@ -48,4 +84,7 @@ def analyze(payload: AnalyzeRequest) -> AnalyzeResponse:
         headers_raw=payload.headers_raw,
         attachments=[a.filename for a in payload.attachments],
     )
-    return AnalyzeResponse.model_validate(result.model_dump())
+    fields = {name: getattr(result, name) for name in AnalyzeResponse.model_fields}
+    response = AnalyzeResponse.model_construct(**fields)
+    # Serialize in pydantic-core straight to JSON (no jsonable_encoder + json.dumps pass).
+    return response.model_dump_json()
@@ -1,6 +1,7 @@
 # app/core/analyzer.py
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable
 
@@ -9,10 +10,13 @@ from app.core.extractors import extract_all
 from app.core.rule_engine import RuleEngine
 from app.core.scoring import score_to_result
 from app.core.types import AnalysisResult
+from app.utils.text_norm import normalize_for_matching
+
+_DEFAULT_RULE_PACK = Path(__file__).resolve().parents[1] / "rules" / "pack_default.yml"
 
 
 def _default_rule_pack_path() -> Path:
-    return Path(__file__).resolve().parents[1] / "rules" / "pack_default.yml"
+    return _DEFAULT_RULE_PACK
 
 
 def _join_message_parts(
@@ -25,26 +29,24 @@ def _join_message_parts(
     attachments: Iterable[str] | None,
 ) -> str:
     parts: list[str] = []
+    append = parts.append
 
     if subject:
-        parts.append(f"Subject: {subject}")
+        append(f"Subject: {subject}")
     if from_email:
-        parts.append(f"From: {from_email}")
+        append(f"From: {from_email}")
     if reply_to:
-        parts.append(f"Reply-To: {reply_to}")
+        append(f"Reply-To: {reply_to}")
     if headers_raw:
-        parts.append("Headers:")
-        parts.append(headers_raw)
-
+        parts += ("Headers:", headers_raw)
     if body:
-        parts.append("Body:")
-        parts.append(body)
+        parts += ("Body:", body)
 
     if attachments:
-        parts.append("Attachments:")
-        for fn in attachments:
-            if fn:
-                parts.append(f"- {fn}")
+        names = [f"- {fn}" for fn in attachments if fn]
+        if names:  # no bare "Attachments:" header when every filename is empty
+            append("Attachments:")
+            parts += names
 
     return "\n".join(parts).strip()
 
@@ -58,6 +60,12 @@ class Analyzer:
     def __init__(self, rule_pack_path: str | Path | None = None) -> None:
         path = Path(rule_pack_path) if rule_pack_path else _default_rule_pack_path()
         self.engine = RuleEngine.from_yaml(path)
+        # Serialized rule listing, filled in lazily by the API (rules never change after load),
+        # so it lives and dies with this analyzer.
+        self.rules_json: bytes | None = None
+
+    def close(self) -> None:
+        self.engine.close()
 
     def analyze(
         self,
@@ -84,7 +92,18 @@ class Analyzer:
             domains=art.domains,
             emails=art.emails,
             phones=art.phones,
+            haystack=normalize_for_matching(text),
+            text=text,
         )
 
-        hits = self.engine.match(text, ctx=ctx)
+        hits = self.engine.match_with_context(text, ctx)
         return score_to_result(hits)
+
+
+@lru_cache(maxsize=1)
+def get_default_analyzer() -> Analyzer:
+    """
+    Process-wide Analyzer for the default rule pack (compiled once, reused everywhere).
+    Treat it as shared: don't mutate it outside of test monkeypatching.
+    """
+    return Analyzer()
@@ -1,10 +1,10 @@
 # app/core/context.py
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AnalysisContext:
     """
     Structured context passed to the rule engine for context-aware rules.
@@ -14,4 +14,16 @@ class AnalysisContext:
     domains: list[str]
     emails: list[str]
     phones: list[str]
+    # normalize_for_matching(text) and the text it was built from, so engines can skip
+    # re-normalizing when they get that same text
+    haystack: str | None = None
+    text: str | None = field(default=None, repr=False)
+    # lowercased once, for locating tokens in the (lowercase) haystack;
+    # extractor domains already are lowercase and keep their interned identity
+    urls_lower: tuple[str, ...] = field(init=False, repr=False, compare=False)
+    domains_lower: tuple[str, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "urls_lower", tuple(u.lower() for u in self.urls))
+        object.__setattr__(self, "domains_lower", tuple(d if d.islower() else d.lower() for d in self.domains))
 
@@ -2,55 +2,173 @@
 from __future__ import annotations
 
 import re
+import sys
+import threading
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Iterable
 from urllib.parse import urlsplit
 
+try:  # optional accelerator: pip install "phishshield[accel]"
+    import hyperscan  # type: ignore
+except ImportError:  # pragma: no cover
+    hyperscan = None
+
 # Characters that often wrap URLs in emails/chats.
 _WRAPPING_CHARS = "\"'<>[](){}"
 
 # Characters that commonly trail URLs (punctuation) in sentences.
 _TRAILING_PUNCT = ".,;:!?…"
 
+# Everything _clean_url may trim from the end of a URL candidate.
+_TRAILING_NOISE = _TRAILING_PUNCT + _WRAPPING_CHARS
+
+# One-layer wrapper pairs removed by _strip_balanced_wrappers.
+_BALANCED_PAIRS = (("(", ")"), ("[", "]"), ("{", "}"), ("<", ">"), ('"', '"'), ("'", "'"))
+
+# Extractor patterns. They share one set of flags (and one Hyperscan database, see
+# _build_hs_db), so they are written to be valid under re.IGNORECASE | re.VERBOSE
+# (no literal spaces or '#').
+
 # A pragmatic URL regex:
 # - captures http/https URLs
 # - stops at whitespace
-# - keeps most valid URL characters
-_URL_RE = re.compile(r"(?i)\bhttps?://[^\s<>\]]+")
+# - keeps most valid URL characters (wrappers/trailing punctuation are trimmed by _clean_url)
+_URL_PATTERN = r"\bhttps?://[^\s<>\]]+"
 
 # Simple, safe email regex (good enough for phishing detection signals)
-_EMAIL_RE = re.compile(
-    r"(?i)\b[a-z0-9._%+-]{1,64}@(?:[a-z0-9-]{1,63}\.)+[a-z]{2,63}\b"
-)
+_EMAIL_PATTERN = r"\b[a-z0-9._%+-]{1,64}@(?:[a-z0-9-]{1,63}\.)+[a-z]{2,63}\b"
 
 # Very pragmatic phone regex (international-ish). We keep it conservative to avoid FP.
-_PHONE_RE = re.compile(
-    r"""
+_PHONE_PATTERN = r"""
     (?<!\w)
     (?:\+?\d{1,3}[\s-]?)?          # optional country code
     (?:\(?\d{2,4}\)?[\s-]?)        # area / operator
     \d{3}[\s-]?\d{4}               # local
     (?!\w)
-    """,
-    re.VERBOSE,
-)
+"""
+
+# Artifact kinds (also used as Hyperscan expression ids).
+_KIND_URL = 0
+_KIND_EMAIL = 1
+_KIND_PHONE = 2
+_ALL_KINDS = frozenset({_KIND_URL, _KIND_EMAIL, _KIND_PHONE})
+
+_KIND_PATTERNS: dict[int, str] = {
+    _KIND_URL: _URL_PATTERN,
+    _KIND_EMAIL: _EMAIL_PATTERN,
+    _KIND_PHONE: _PHONE_PATTERN,
+}
 
-# Common URL shorteners (extendable)
-_SHORTENER_DOMAINS = {
-    "bit.ly",
-    "t.co",
-    "tinyurl.com",
-    "goo.gl",
-    "ow.ly",
-    "is.gd",
-    "buff.ly",
-    "cutt.ly",
-    "rebrand.ly",
-    "shorturl.at",
+# Compiled once at import. Each kind is scanned on its own: artifacts can nest
+# (an email in a URL query, a phone number in a URL path or an email's local part)
+# and must still be reported for their own kind.
+_KIND_RES: dict[int, re.Pattern[str]] = {
+    kind: re.compile(pattern, re.IGNORECASE | re.VERBOSE) for kind, pattern in _KIND_PATTERNS.items()
 }
 
 
-@dataclass(frozen=True)
+def _build_hs_db():
+    """
+    Compile the extractor regexes into one Hyperscan database (prefilter mode).
+
+    Hyperscan reports every match end (not finditer-style leftmost matches) and
+    works on UTF-8 byte offsets, so it is only used to answer "can this kind of
+    artifact occur at all?" in a single pass. Extraction itself stays on `re`.
+    """
+    if hyperscan is None:
+        return None
+
+    flags = (
+        hyperscan.HS_FLAG_PREFILTER  # approximate lookarounds instead of rejecting them
+        | hyperscan.HS_FLAG_SINGLEMATCH
+        | hyperscan.HS_FLAG_CASELESS
+        | hyperscan.HS_FLAG_UTF8
+        | hyperscan.HS_FLAG_UCP
+    )
+    kinds = sorted(_KIND_PATTERNS)
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[("(?x)" + _KIND_PATTERNS[k]).encode("utf-8") for k in kinds],
+            ids=kinds,
+            flags=[flags] * len(kinds),
+        )
+    except Exception:  # pragma: no cover - unsupported build/pattern: fall back to re only
+        return None
+    return db
+
+
+_HS_DB = _build_hs_db()
+_hs_local = threading.local()  # Hyperscan scratch space is per-thread
+
+
+_DIGIT_RE = re.compile(r"\d")
+
+
+def _sentinel_kinds(text: str) -> frozenset[int]:
+    """
+    Cheap C-level substring checks for characters each artifact kind requires:
+    "://" for URLs, "@" for emails, a digit for phones.
+    """
+    kinds: set[int] = set()
+    if "://" in text:
+        kinds.add(_KIND_URL)
+    if "@" in text:
+        kinds.add(_KIND_EMAIL)
+    if _DIGIT_RE.search(text):
+        kinds.add(_KIND_PHONE)
+    return frozenset(kinds)
+
+
+def _present_kinds(text: str) -> frozenset[int]:
+    """
+    Return the artifact kinds that may occur in text (a superset; never drops a real match).
+    Uses Hyperscan when available, otherwise sentinel substring checks.
+    """
+    # re.IGNORECASE also folds a few non-ASCII letters onto [a-z] (e.g. 'İ', the Kelvin
+    # sign), which Hyperscan's caseless mode does not, so only ASCII text may use it.
+    if _HS_DB is None or not text.isascii():
+        return _sentinel_kinds(text)
+
+    scratch = getattr(_hs_local, "scratch", None)
+    if scratch is None:
+        scratch = _hs_local.scratch = hyperscan.Scratch(_HS_DB)
+
+    found: set[int] = set()
+
+    def on_match(kind: int, start: int, end: int, flags: int, context) -> bool:
+        found.add(kind)
+        return len(found) == len(_ALL_KINDS)  # True stops the scan
+
+    try:
+        _HS_DB.scan(text.encode("utf-8", "replace"), match_event_handler=on_match, scratch=scratch)
+    except hyperscan.ScanTerminated:
+        pass
+    return frozenset(found)
+
+
+# Deletion table for _normalize_phone: drops every non-digit ASCII char in one C-level pass.
+_PHONE_STRIP = str.maketrans("", "", "".join(chr(c) for c in range(128) if not chr(c).isdigit()))
+
+# Common URL shorteners (extendable). Immutable so the memoized helpers never go stale.
+_SHORTENER_DOMAINS: frozenset[str] = frozenset(
+    {
+        "bit.ly",
+        "t.co",
+        "tinyurl.com",
+        "goo.gl",
+        "ow.ly",
+        "is.gd",
+        "buff.ly",
+        "cutt.ly",
+        "rebrand.ly",
+        "shorturl.at",
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
 class ExtractedArtifacts:
     """
     Structured artifacts extracted from message text.
@@ -66,14 +184,50 @@ class ExtractedArtifacts:
 def extract_all(text: str) -> ExtractedArtifacts:
     """
     Convenience helper: extract urls/domains/emails/phones from text.
+    Only kinds that can occur in the text (see _present_kinds) are scanned.
     """
-    urls = extract_urls(text)
-    domains = extract_domains(urls)
-    emails = extract_emails(text)
-    phones = extract_phones(text)
+    kinds = _present_kinds(text) if text else frozenset()
+    urls, domains, emails, phones = _scan_artifacts(text, kinds)
     return ExtractedArtifacts(urls=urls, domains=domains, emails=emails, phones=phones)
 
 
+def _scan_artifacts(
+    text: str, kinds: frozenset[int]
+) -> tuple[list[str], list[str], list[str], list[str]]:
+    """
+    One finditer pass per requested kind, each over the whole text.
+    Returns (urls, domains, emails, phones), each unique in appearance order.
+    Each URL is parsed once; its host feeds `domains` directly.
+    Kinds not requested always come back empty.
+    """
+    if not text or not kinds:
+        return [], [], [], []
+
+    # Insertion-ordered dicts dedupe with one hash lookup per element.
+    urls: dict[str, str] = {}  # url -> normalized host
+    emails: dict[str, None] = {}
+    phones: dict[str, None] = {}
+
+    if _KIND_URL in kinds:
+        for m in _KIND_RES[_KIND_URL].finditer(text):
+            url, host = _clean_url_and_host(m.group(0))
+            if url:
+                urls[url] = host
+
+    if _KIND_EMAIL in kinds:
+        for m in _KIND_RES[_KIND_EMAIL].finditer(text):
+            emails[sys.intern(m.group(0).lower())] = None
+
+    if _KIND_PHONE in kinds:
+        for m in _KIND_RES[_KIND_PHONE].finditer(text):
+            norm = _normalize_phone(m.group(0).strip())
+            if norm:
+                phones[norm] = None
+
+    domains = list(dict.fromkeys(h for h in urls.values() if h))
+    return list(urls), domains, list(emails), list(phones)
+
+
 def extract_urls(text: str) -> list[str]:
     """
     Extract http/https URLs from text, with cleanup:
@@ -82,23 +236,9 @@ def extract_urls(text: str) -> list[str]:
     - balances common wrapping pairs (e.g. "(https://x.com)")
     Returns unique URLs in appearance order.
     """
-    if not text:
+    if not text or "://" not in text:  # every URL match contains the scheme separator
         return []
-
-    out: list[str] = []
-    seen: set[str] = set()
-
-    for m in _URL_RE.finditer(text):
-        raw = m.group(0)
-        url = _clean_url(raw)
-        if not url:
-            continue
-        if url in seen:
-            continue
-        seen.add(url)
-        out.append(url)
-
-    return out
+    return _scan_artifacts(text, frozenset({_KIND_URL}))[0]
 
 
 def _clean_url(url: str) -> str:
@@ -106,42 +246,43 @@ def _clean_url(url: str) -> str:
     Clean a URL candidate without being too clever.
     The goal is stable extraction, not full RFC compliance.
     """
+    return _clean_url_and_host(url)[0]
+
+
+def _clean_url_and_host(url: str) -> tuple[str, str]:
+    """
+    Clean a URL candidate and parse it once.
+    Returns (cleaned url, normalized host), or ("", "") if it is not a usable URL.
+    """
     if not url:
-        return ""
+        return "", ""
 
     s = url.strip()
 
-    # Strip wrapping characters from both ends (quotes/brackets/etc.)
-    s = s.strip(_WRAPPING_CHARS)
+    # Only tidy candidates that start with a wrapper or end in punctuation/wrappers.
+    if s and (s[0] in _WRAPPING_CHARS or s[-1] in _TRAILING_NOISE):
+        # Strip wrapping characters from both ends (quotes/brackets/etc.)
+        s = s.strip(_WRAPPING_CHARS)
 
-    # Trim trailing punctuation repeatedly (".", ",", "!", "…", etc.)
-    while s and s[-1] in _TRAILING_PUNCT:
-        s = s[:-1]
+        # Trim trailing punctuation (".", ",", "!", "…", etc.), then the wrapping characters
+        # exposed by that: "https://example.com/path?a=1)," -> "https://example.com/path?a=1"
+        # One round each, so punctuation before a wrapper stays: "x?q=1!)" -> "x?q=1!".
+        s = s.rstrip(_TRAILING_PUNCT).rstrip(_WRAPPING_CHARS)
 
-    # Strip trailing wrapping characters that may have been exposed after punctuation removal
-    # e.g., "https://example.com/path?a=1)," -> after comma removal -> "https://example.com/path?a=1)"
-    while s and s[-1] in _WRAPPING_CHARS:
-        s = s[:-1]
+        # Balance one-layer parentheses/brackets if user wrote "(https://...)" etc.
+        s = _strip_balanced_wrappers(s)
 
-    # Balance one-layer parentheses/brackets if user wrote "(https://...)" etc.
-    s = _strip_balanced_wrappers(s)
-
-    # Quick sanity check: must still look like a URL
-    if not s.lower().startswith(("http://", "https://")):
-        return ""
+    # Quick sanity check: must still look like a URL (lowercase only the scheme, not the whole URL)
+    if not s[:8].lower().startswith(("http://", "https://")):
+        return "", ""
 
     # Ensure we can parse a host
-    try:
-        parts = urlsplit(s)
-    except Exception:
-        return ""
+    host = _parse_host(s)
+    if host is None:
+        return "", ""
 
-    if not parts.netloc:
-        return ""
-
-    # Remove trailing dot in host (rare, but exists in some texts)
-    # We do not rewrite the full URL; just return cleaned string.
-    return s
+    # We do not rewrite the full URL; just return cleaned string (+ its normalized host).
+    return s, host
 
 
 def _strip_balanced_wrappers(s: str) -> str:
@@ -152,8 +293,7 @@ def _strip_balanced_wrappers(s: str) -> str:
     if len(s) < 2:
         return s
 
-    pairs = {("(", ")"), ("[", "]"), ("{", "}"), ("<", ">"), ('"', '"'), ("'", "'")}
-    for left, right in pairs:
+    for left, right in _BALANCED_PAIRS:
         if s.startswith(left) and s.endswith(right):
             return s[1:-1].strip()
     return s
@@ -167,34 +307,41 @@ def extract_domains(urls: Iterable[str]) -> list[str]:
     - strips leading 'www.'
     Returns unique domains in appearance order.
     """
-    out: list[str] = []
-    seen: set[str] = set()
-
+    out: dict[str, None] = {}
     for u in urls:
         d = domain_from_url(u)
-        if not d:
-            continue
-        if d in seen:
-            continue
-        seen.add(d)
-        out.append(d)
-
-    return out
+        if d:
+            out[d] = None
+    return list(out)
 
 
+@lru_cache(maxsize=4096)
 def domain_from_url(url: str) -> str:
     """
     Parse and normalize the hostname from a URL.
     """
     if not url:
         return ""
+    return _parse_host(url) or ""
+
 
+def _parse_host(url: str) -> str | None:
+    """
+    The single place URLs are parsed (one urlsplit).
+    Returns the normalized host ("" if the netloc has no hostname),
+    or None if the URL cannot be parsed or has no netloc.
+    """
     try:
         parts = urlsplit(url)
+        hostname = parts.hostname
     except Exception:
-        return ""
+        return None
 
-    host = (parts.hostname or "").strip().lower()
+    if not parts.netloc:
+        return None
+
+    # Normalize: lowercase, drop a leading 'www.' and a trailing dot.
+    host = (hostname or "").strip().lower()
     if not host:
         return ""
 
@@ -204,7 +351,9 @@ def domain_from_url(url: str) -> str:
     # Basic cleanup (avoid ending dot)
     host = host.rstrip(".")
 
-    return host
+    # Hosts repeat across URLs and messages and key the domain/reputation caches;
+    # interned copies share one object (URLs themselves vary too much to intern).
+    return sys.intern(host)
 
 
 def extract_emails(text: str) -> list[str]:
@@ -212,20 +361,7 @@ def extract_emails(text: str) -> list[str]:
     Extract email addresses from text.
     Returns unique emails in appearance order (lowercased).
     """
-    if not text:
-        return []
-
-    out: list[str] = []
-    seen: set[str] = set()
-
-    for m in _EMAIL_RE.finditer(text):
-        email = m.group(0).lower()
-        if email in seen:
-            continue
-        seen.add(email)
-        out.append(email)
-
-    return out
+    return _scan_artifacts(text, frozenset({_KIND_EMAIL}))[2]
 
 
 def extract_phones(text: str) -> list[str]:
@@ -235,23 +371,7 @@ def extract_phones(text: str) -> list[str]:
 
     Note: This is optional signal only. Expect some FP; keep weights low if you add phone rules.
     """
-    if not text:
-        return []
-
-    out: list[str] = []
-    seen: set[str] = set()
-
-    for m in _PHONE_RE.finditer(text):
-        raw = m.group(0).strip()
-        norm = _normalize_phone(raw)
-        if not norm:
-            continue
-        if norm in seen:
-            continue
-        seen.add(norm)
-        out.append(norm)
-
-    return out
+    return _scan_artifacts(text, frozenset({_KIND_PHONE}))[3]
 
 
 def _normalize_phone(s: str) -> str:
@@ -266,7 +386,10 @@ def _normalize_phone(s: str) -> str:
 
     s = s.strip()
     plus = s.startswith("+")
-    digits = re.sub(r"\D+", "", s)
+    digits = s.translate(_PHONE_STRIP)
+    if not digits.isdecimal():
+        # Rare: non-ASCII separators/digits (\s and \d are Unicode-aware in the regex)
+        digits = "".join(ch for ch in digits if ch.isdecimal())
 
     # Too short => likely not a phone
     if len(digits) < 9:
@@ -276,7 +399,9 @@ def _normalize_phone(s: str) -> str:
 
 
 # --- helper checks for rules/services (optional but handy) ---
+# Pure functions of the domain string; memoized because rules re-check the same domains.
 
+@lru_cache(maxsize=4096)
 def is_shortener_domain(domain: str) -> bool:
     d = (domain or "").strip().lower()
     if d.startswith("www."):
@@ -284,17 +409,31 @@ def is_shortener_domain(domain: str) -> bool:
     return d in _SHORTENER_DOMAINS
 
 
+@lru_cache(maxsize=4096)
 def is_punycode_domain(domain: str) -> bool:
     d = (domain or "").lower()
     return "xn--" in d
 
 
+@lru_cache(maxsize=4096)
 def subdomain_count(domain: str) -> int:
     """
     Count labels in domain. Example:
       a.b.c.example.com -> 6 labels
     """
-    d = (domain or "").strip(".").lower()
+    d = (domain or "").strip(".")
     if not d:
         return 0
+    if ".." not in d:
+        # Fast path: no empty labels, so labels == dots + 1 (no list allocation).
+        return d.count(".") + 1
     return len([p for p in d.split(".") if p])
+
+
+@lru_cache(maxsize=4096)
+def classify_domain(domain: str) -> tuple[bool, bool, int]:
+    """
+    (is_shortener_domain, is_punycode_domain, subdomain_count) in one call,
+    for callers that check all three on every domain.
+    """
+    return is_shortener_domain(domain), is_punycode_domain(domain), subdomain_count(domain)
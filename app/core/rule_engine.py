@@ -4,14 +4,30 @@ from __future__ import annotations
 import logging
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING, Iterable, Sequence
 
-from app.core.extractors import is_punycode_domain, is_shortener_domain, subdomain_count
+from app.core.extractors import classify_domain
 from app.core.types import Action, Evidence, Rule, RuleHit, RulePattern, Severity
 from app.services.url_reputation import UrlReputationService
 from app.utils.text_norm import normalize_for_matching
 
+try:  # optional accelerator: pip install "phishshield[accel]"
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover
+    ahocorasick = None
+
+try:  # optional accelerator: pip install "phishshield[accel]"
+    import re2  # type: ignore
+except ImportError:  # pragma: no cover
+    re2 = None
+
+try:  # optional accelerator: pip install "phishshield[accel]"
+    import pcre2  # type: ignore
+except ImportError:  # pragma: no cover
+    pcre2 = None
+
 if TYPE_CHECKING:
     from app.core.context import AnalysisContext
 
@@ -29,6 +45,7 @@ _FLAG_MAP: dict[str, int] = {
 }
 
 
+@lru_cache(maxsize=64)
 def _compile_flags(flags: str | None) -> int:
     """
     Build regex flags from string.
@@ -52,20 +69,127 @@ def _compile_flags(flags: str | None) -> int:
     return value
 
 
+# RE2's \b, \w, \d and \s are ASCII-only (re's are Unicode-aware), and RE2 reads "[:alpha:]"
+# inside a class as a POSIX class where re sees literal characters, so such patterns stay on re.
+_RE2_UNSAFE_RE = re.compile(r"\\[bBwWdDsS]|\[:")
+_RE2_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+
+if re2 is not None:
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False
+
+
+# Compiled patterns are immutable and thread-safe, so rules (and rule-pack reloads) that
+# repeat an expression share one compiled object. re's own cache only holds 512 entries
+# and RE2/PCRE2 have none.
+@lru_cache(maxsize=1024)
+def _compile_re(value: str, flags: int) -> re.Pattern[str]:
+    return re.compile(value, flags=flags)
+
+
+def _re2_source(value: str, flags: int) -> str | None:
+    """RE2 source with re's flags inlined, or None when RE2 would match differently than re."""
+    if re2 is None or not value.isascii() or _RE2_UNSAFE_RE.search(value):
+        return None
+    if "$" in value and not flags & re.MULTILINE:
+        return None  # re's "$" also matches before a trailing newline
+
+    inline = "".join(ch for flag, ch in _RE2_INLINE_FLAGS if flags & flag)
+    return f"(?{inline}){value}" if inline else value
+
+
+@lru_cache(maxsize=1024)
+def _compile_re2(value: str, flags: int):
+    """
+    Compile with RE2 (linear time, no backtracking) when it matches exactly like re would.
+    Returns None when RE2 is unavailable or the pattern needs re (lookaround, backrefs, ...).
+    """
+    source = _re2_source(value, flags)
+    if source is None:
+        return None
+    try:
+        return re2.compile(source, _RE2_OPTIONS)
+    except re2.error:
+        return None
+
+
+# \Z means "end or before a final newline" in PCRE; "{,n}" is only a quantifier in newer PCRE2;
+# "[:alpha:]" inside a class is a POSIX class in PCRE2 but literal characters in re.
+_PCRE2_UNSAFE_RE = re.compile(r"\\Z|\{,|\[:")
+
+if pcre2 is not None:
+    _PCRE2_FLAG_MAP: dict[int, int] = {
+        re.IGNORECASE: pcre2.IGNORECASE,
+        re.MULTILINE: pcre2.MULTILINE,
+        re.DOTALL: pcre2.DOTALL,
+    }
+
+
+# re's \s also matches the ASCII separators \x1c-\x1f; PCRE2's does not.
+_RE_ONLY_SPACE_RE = re.compile(r"[\x1c-\x1f]")
+
+
+def _accel_safe(text: str) -> bool:
+    r"""
+    True when RE2/PCRE2 patterns match text exactly like their re fallback would:
+    plain ASCII (no Unicode case folding or classes involved) without \x1c-\x1f.
+    """
+    return text.isascii() and _RE_ONLY_SPACE_RE.search(text) is None
+
+
+@lru_cache(maxsize=1024)
+def _compile_pcre2(value: str, flags: int):
+    r"""
+    JIT-compile with PCRE2 (native code per pattern). Its \b, \w, \d, \s and case folding
+    only agree with re on ASCII text, so callers keep the re pattern as a fallback (see
+    _accel_safe). Returns None when PCRE2 is unavailable or rejects the pattern.
+    """
+    if pcre2 is None or _PCRE2_UNSAFE_RE.search(value):
+        return None
+
+    pcre_flags = 0
+    for flag, pcre_flag in _PCRE2_FLAG_MAP.items():
+        if flags & flag:
+            pcre_flags |= pcre_flag
+    try:
+        return pcre2.compile(value, pcre_flags, jit=True)
+    except pcre2.error:
+        return None
+
+
+# Per-pattern evidence caps (a rule's overall cap is max_evidence_per_rule).
+_MAX_PER_KEYWORD = 8
+_MAX_PER_REGEX = 10
+
+
 def _snippet(text: str, start: int, end: int, window: int = 48) -> str:
-    left = max(0, start - window)
-    right = min(len(text), end + window)
-    prefix = "…" if left > 0 else ""
-    suffix = "…" if right < len(text) else ""
-    return f"{prefix}{text[left:right]}{suffix}"
+    # Short messages: the window covers everything, so reuse `text` itself (no copy).
+    left = start - window
+    right = end + window
+    n = len(text)
+    if left <= 0:
+        return text if right >= n else text[:right] + "…"
+    if right >= n:
+        return "…" + text[left:]
+    return "…" + text[left:right] + "…"
+
+
+# Group references depend on group numbering/names, which change once a pattern is wrapped.
+_GROUP_REF_RE = re.compile(r"\\[1-9]|\(\?P[<=]")
 
 
 @dataclass(frozen=True)
 class _CompiledPattern:
     raw: RulePattern
-    kind: str  # "keyword" | "regex"
+    kind: str  # "keyword" | "regex" | "regex_re2" | "regex_pcre"
     keyword: str | None = None
-    regex: re.Pattern[str] | None = None
+    regex: re.Pattern[str] | None = None  # re2/pcre2 pattern for the accelerated kinds (same finditer API)
+    keyword_prefix2: str | None = None  # first two chars of keyword, for the bigram prefilter
+    # re pattern used instead of `regex` on text the accelerated engine would match
+    # differently (see _accel_safe; e.g. re.IGNORECASE folds 'İ' to 'i', RE2's (?i) does not)
+    fallback: re.Pattern[str] | None = None
+    # per-pattern evidence cap: the kind's cap, bounded by the engine's max_evidence_per_rule
+    cap: int = _MAX_PER_REGEX
 
 
 @dataclass(frozen=True)
@@ -73,6 +197,38 @@ class _CompiledRule:
     rule: Rule
     match_mode: str  # "any" | "all"
     patterns: tuple[_CompiledPattern, ...]
+    # "any" rules with 2+ plain-re regexes sharing flags: their alternation, used to
+    # reject texts none of them can match with a single search
+    union_regex: re.Pattern[str] | None = None
+
+
+def _build_union(compiled: Sequence[_CompiledPattern]) -> re.Pattern[str] | None:
+    """
+    Join the plain-re regexes of a rule into (?:...)|(?:...)|... . The alternation matches
+    somewhere iff at least one member does, so one failed search proves every member
+    would find nothing. Evidence still comes from per-pattern scans: finditer over the
+    alternation would hide overlapping matches of later members.
+    Returns None when the patterns can't be safely combined.
+    """
+    members = [cp for cp in compiled if cp.kind == "regex" and cp.regex is not None]
+    if len(members) < 2:
+        return None
+
+    flags = {cp.regex.flags for cp in members}
+    if len(flags) != 1:
+        return None
+
+    for cp in members:
+        # Group numbers shift once wrapped; a member matching "" makes the union match everywhere.
+        if _GROUP_REF_RE.search(cp.raw.value) or cp.regex.fullmatch("") is not None:
+            return None
+
+    source = "|".join(f"(?:{cp.raw.value})" for cp in members)
+    try:
+        # Inline global flags like a leading (?i) are rejected inside an alternation.
+        return re.compile(source, flags=flags.pop())
+    except re.error:
+        return None
 
 
 class RuleEngine:
@@ -85,12 +241,22 @@ class RuleEngine:
         self._rules = [r for r in rules if r.enabled]
         self._max_evidence_per_rule = max(1, int(max_evidence_per_rule))
         self._compiled = tuple(self._compile_rule(r) for r in self._rules)
+        self._keyword_automaton = self._build_keyword_automaton()
+        # Without the automaton every keyword costs a str.find; for big packs reject absent
+        # keywords first via a haystack bigram set (only pays off with many keywords).
+        keyword_count = sum(cp.kind == "keyword" for cr in self._compiled for cp in cr.patterns)
+        self._use_bigram_filter = self._keyword_automaton is None and keyword_count > 50
+        self._re2_set, self._re2_set_members = self._build_re2_set()
         self._reputation = UrlReputationService()
 
     @property
     def rules(self) -> Sequence[Rule]:
         return self._rules
 
+    def close(self) -> None:
+        """Release network resources (reputation HTTP client)."""
+        self._reputation.close()
+
     @classmethod
     def from_yaml(cls, path: str | Path, *, max_evidence_per_rule: int = 20) -> "RuleEngine":
         path = Path(path)
@@ -124,7 +290,7 @@ class RuleEngine:
         # Validate regex compilation early (fail-fast).
         for cr in engine._compiled:
             for cp in cr.patterns:
-                if cp.kind == "regex" and cp.regex is None:
+                if cp.kind.startswith("regex") and cp.regex is None:
                     raise RulePackError(f"Regex compilation failed for rule {cr.rule.id}: {cp.raw.value}")
 
         return engine
@@ -136,58 +302,130 @@ class RuleEngine:
         """
         if not text:
             return []
+        if ctx is None:
+            return self._match_no_ctx(text, normalize_for_matching(text))
+        return self.match_with_context(text, ctx)
 
-        haystack = normalize_for_matching(text)
-        hits: list[RuleHit] = []
-
+    def match_with_context(self, text: str, ctx: AnalysisContext) -> list[RuleHit]:
+        """YAML rules plus context rules (shortener/punycode/subdomains/reputation)."""
+        if not text:
+            return []
+        # Equal texts only (usually the same object); equal hashes would not prove it.
+        if ctx.haystack is not None and ctx.text == text:
+            haystack = ctx.haystack
+        else:
+            haystack = normalize_for_matching(text)
+        return self._match_with_ctx(text, haystack, ctx)
+
+    def _match_no_ctx(self, text: str, haystack: str) -> list[RuleHit]:
         # 1) YAML-backed rules
+        keyword_spans = self._scan_keywords(haystack)
+        bigrams = {haystack[i : i + 2] for i in range(len(haystack) - 1)} if self._use_bigram_filter else None
+        accel_safe = _accel_safe(text)
+        re2_misses = self._re2_set_misses(text, accel_safe)
+        match_rule = self._match_rule
+        hits: list[RuleHit] = []
         for cr in self._compiled:
-            evidence: list[Evidence] = []
-
-            if cr.match_mode == "all":
-                # In "all" mode: every pattern must match at least once.
-                # We only need ONE evidence per pattern to prove it matched.
-                ok = True
-                for cp in cr.patterns:
-                    ev = list(self._match_one(cp, text, haystack))
-                    if not ev:
-                        ok = False
-                        break
-                    # Take only the first evidence for this pattern (proof it matched)
-                    evidence.append(ev[0])
-                    if len(evidence) >= self._max_evidence_per_rule:
-                        break
-
-                if ok and evidence:
-                    hits.append(self._to_hit(cr.rule, evidence))
-
-            else:  # any
-                for cp in cr.patterns:
-                    for ev in self._match_one(cp, text, haystack):
-                        evidence.append(ev)
-                        if len(evidence) >= self._max_evidence_per_rule:
-                            break
-                    if len(evidence) >= self._max_evidence_per_rule:
-                        break
-
-                if evidence:
-                    hits.append(self._to_hit(cr.rule, evidence))
+            hit = match_rule(cr, text, haystack, keyword_spans, bigrams, re2_misses, accel_safe)
+            if hit is not None:
+                hits.append(hit)
+        return hits
 
+    def _match_with_ctx(self, text: str, haystack: str, ctx: AnalysisContext) -> list[RuleHit]:
+        hits = self._match_no_ctx(text, haystack)
         # 2) Context rules (hard-coded, SOC-like)
-        if ctx is not None:
-            hits.extend(self._context_hits(text, haystack, ctx))
-
+        hits.extend(self._context_hits(text, haystack, ctx))
         return hits
 
+    def _match_rule(
+        self,
+        cr: _CompiledRule,
+        text: str,
+        haystack: str,
+        keyword_spans: dict[str, list[tuple[int, int]]] | None,
+        bigrams: set[str] | None,
+        re2_misses: frozenset[int] | None = None,
+        accel_safe: bool | None = None,
+    ) -> RuleHit | None:
+        """Evaluate one compiled YAML rule; returns its hit or None."""
+        # Without the optional extras every pattern is a plain-re regex or a str.find keyword;
+        # those call their finder directly instead of dispatching through _match_one.
+        find_regex = self._find_regex
+        find_keyword = self._find_keyword
+        match_one = self._match_one
+        evidence: list[Evidence] = []
+
+        if cr.match_mode == "all":
+            # In "all" mode: every pattern must match at least once.
+            # We only need ONE evidence per pattern to prove it matched.
+            for cp in cr.patterns:
+                kind = cp.kind
+                if kind == "regex":
+                    ev = find_regex(text, cp.regex, label=cp.raw.label, pattern=cp.raw.value, max_hits=1)
+                elif kind == "keyword" and keyword_spans is None and bigrams is None:
+                    ev = find_keyword(text, haystack, cp.keyword, label=cp.raw.label, pattern=cp.raw.value, max_hits=1)
+                else:
+                    ev = match_one(cp, text, haystack, keyword_spans, bigrams, re2_misses, accel_safe, 1)
+                if not ev:
+                    return None
+                # Take only the first evidence for this pattern (proof it matched)
+                evidence.append(ev[0])
+                if len(evidence) >= self._max_evidence_per_rule:
+                    break
+
+            return self._to_hit(cr.rule, evidence) if evidence else None
+
+        # any: matchers get the remaining evidence budget, so scans stop as soon as it is met.
+        budget = self._max_evidence_per_rule
+        skip_regex = cr.union_regex is not None and cr.union_regex.search(text) is None
+        for cp in cr.patterns:
+            # cp.cap already fits the budget, so only a partly used budget needs min().
+            limit = min(budget - len(evidence), cp.cap) if evidence else cp.cap
+            kind = cp.kind
+            if kind == "regex":
+                if skip_regex:
+                    continue
+                evidence.extend(find_regex(text, cp.regex, label=cp.raw.label, pattern=cp.raw.value, max_hits=limit))
+            elif kind == "keyword" and keyword_spans is None and bigrams is None:
+                evidence.extend(
+                    find_keyword(text, haystack, cp.keyword, label=cp.raw.label, pattern=cp.raw.value, max_hits=limit)
+                )
+            else:
+                evidence.extend(match_one(cp, text, haystack, keyword_spans, bigrams, re2_misses, accel_safe, limit))
+            if len(evidence) >= budget:
+                break
+
+        return self._to_hit(cr.rule, evidence) if evidence else None
+
     # -------------------- Context Rules --------------------
 
     def _context_hits(self, text: str, haystack: str, ctx: "AnalysisContext") -> list[RuleHit]:
+        # Every context rule is driven by URL domains; URL-less mail has nothing to check.
+        if not ctx.domains_lower:
+            return []
         out: list[RuleHit] = []
 
+        # Classify each distinct domain once, in a single pass (lowercased -> as extracted)
+        unique_domains: dict[str, str] = {}
+        for d, d_lower in zip(ctx.domains, ctx.domains_lower):
+            unique_domains.setdefault(d_lower, d)
+        urls = tuple(zip(ctx.urls, ctx.urls_lower))
+        shortener_domains: list[tuple[str, str]] = []
+        puny_domains: list[tuple[str, str]] = []
+        many_subdomains: list[tuple[str, str]] = []
+        for d_lower, d in unique_domains.items():
+            is_short, is_puny, labels = classify_domain(d_lower)
+            if is_short:
+                shortener_domains.append((d, d_lower))
+            if is_puny:
+                puny_domains.append((d, d_lower))
+            # count labels, e.g. a.b.c.d.e.example.com -> 7 labels
+            if labels >= 5:
+                many_subdomains.append((d, d_lower))
+
         # CTX-URL-SHORTENER
-        shortener_domains = [d for d in ctx.domains if is_shortener_domain(d)]
         if shortener_domains:
-            ev = self._evidence_for_any_token(text, haystack, ctx.urls, shortener_domains, kind="keyword")
+            ev = self._evidence_for_any_token(text, haystack, urls, shortener_domains, kind="keyword")
             if ev:
                 out.append(
                     RuleHit(
@@ -203,9 +441,8 @@ class RuleEngine:
                 )
 
         # CTX-URL-PUNYCODE
-        puny_domains = [d for d in ctx.domains if is_punycode_domain(d)]
         if puny_domains:
-            ev = self._evidence_for_any_token(text, haystack, ctx.urls, puny_domains, kind="keyword")
+            ev = self._evidence_for_any_token(text, haystack, urls, puny_domains, kind="keyword")
             if ev:
                 out.append(
                     RuleHit(
@@ -221,10 +458,8 @@ class RuleEngine:
                 )
 
         # CTX-URL-SUBDOMAINS
-        # count labels, e.g. a.b.c.d.e.example.com -> 7 labels
-        many_subdomains = [d for d in ctx.domains if subdomain_count(d) >= 5]
         if many_subdomains:
-            ev = self._evidence_for_any_token(text, haystack, ctx.urls, many_subdomains, kind="keyword")
+            ev = self._evidence_for_any_token(text, haystack, urls, many_subdomains, kind="keyword")
             if ev:
                 out.append(
                     RuleHit(
@@ -242,15 +477,16 @@ class RuleEngine:
         # CTX-URL-REPUTATION (VirusTotal)
         if self._reputation.enabled:
             flagged = []
-            for d in ctx.domains:
-                res = self._reputation.lookup_domain(d)
+            for res in self._reputation.lookup_domains(unique_domains).values():
                 if res and (res.malicious > 0 or res.suspicious > 0):
                     flagged.append(res)
 
             if flagged:
                 # pick top domain (most malicious/suspicious)
                 top = sorted(flagged, key=lambda x: (x.malicious, x.suspicious), reverse=True)[0]
-                ev = self._evidence_for_any_token(text, haystack, ctx.urls, [top.domain], kind="keyword")
+                ev = self._evidence_for_any_token(
+                    text, haystack, urls, [(top.domain, top.domain.lower())], kind="keyword"
+                )
                 if ev:
                     # weight: malicious stronger than suspicious
                     weight = 25 if top.malicious > 0 else 18
@@ -273,20 +509,22 @@ class RuleEngine:
         self,
         text: str,
         haystack: str,
-        urls: Sequence[str],
-        domains: Sequence[str],
+        urls: Sequence[tuple[str, str]],
+        domains: Sequence[tuple[str, str]],
         *,
         kind: str,
     ) -> Evidence | None:
         """
         Try to create a clean Evidence for CTX rules.
         Prefer URL match; fallback to domain match. Uses normalized haystack to locate spans reliably.
+        urls/domains are (token, token.lower()) pairs: the lowercase form is searched for, but
+        spans take the token's own length, as lower() can change it (U+0130 becomes 2 chars).
         """
         # Prefer URL span
-        for u in urls:
+        for u, u_lower in urls:
             if not u:
                 continue
-            idx = haystack.find(u.lower())
+            idx = haystack.find(u_lower)
             if idx != -1:
                 end = idx + len(u)
                 return Evidence(
@@ -300,10 +538,10 @@ class RuleEngine:
                 )
 
         # Fallback domain span
-        for d in domains:
+        for d, d_lower in domains:
             if not d:
                 continue
-            idx = haystack.find(d.lower())
+            idx = haystack.find(d_lower)
             if idx != -1:
                 end = idx + len(d)
                 return Evidence(
@@ -333,31 +571,65 @@ class RuleEngine:
 
         patterns.extend(rule.when.patterns)
 
+        keyword_cap = min(_MAX_PER_KEYWORD, self._max_evidence_per_rule)
+        regex_cap = min(_MAX_PER_REGEX, self._max_evidence_per_rule)
         compiled: list[_CompiledPattern] = []
         for p in patterns:
             if p.type.value == "keyword":
+                kw = p.value.lower()
                 compiled.append(
                     _CompiledPattern(
                         raw=p,
                         kind="keyword",
-                        keyword=p.value.lower(),
+                        keyword=kw,
                         regex=None,
+                        keyword_prefix2=kw[:2] if len(kw) >= 2 else None,
+                        cap=keyword_cap,
                     )
                 )
             elif p.type.value == "regex":
                 flags = _compile_flags(p.flags)
                 try:
-                    rx = re.compile(p.value, flags=flags)
+                    rx = _compile_re(p.value, flags)
                 except re.error as e:
                     raise RulePackError(f"Invalid regex in rule {rule.id}: {p.value}. Error: {e}") from e
-                compiled.append(_CompiledPattern(raw=p, kind="regex", keyword=None, regex=rx))
+                # Prefer RE2 (linear time), then PCRE2-JIT, then the already validated re pattern.
+                rx2 = _compile_re2(p.value, flags)
+                rx_pcre = _compile_pcre2(p.value, flags) if rx2 is None else None
+                if rx2 is not None:
+                    compiled.append(
+                        _CompiledPattern(
+                            raw=p,
+                            kind="regex_re2",
+                            keyword=None,
+                            regex=rx2,
+                            fallback=rx if flags & re.IGNORECASE else None,
+                            cap=regex_cap,
+                        )
+                    )
+                elif rx_pcre is not None:
+                    # PCRE2's case folding and Unicode classes differ from re's, so it only sees ASCII text.
+                    compiled.append(
+                        _CompiledPattern(
+                            raw=p, kind="regex_pcre", keyword=None, regex=rx_pcre, fallback=rx, cap=regex_cap
+                        )
+                    )
+                else:
+                    compiled.append(_CompiledPattern(raw=p, kind="regex", keyword=None, regex=rx, cap=regex_cap))
             else:
                 raise RulePackError(f"Unsupported pattern type in rule {rule.id}: {p.type}")
 
         if not compiled:
             raise RulePackError(f"Rule {rule.id} has no matchers in 'when'.")
 
-        return _CompiledRule(rule=rule, match_mode=rule.when.match, patterns=tuple(compiled))
+        union_regex = _build_union(compiled) if rule.when.match == "any" else None
+
+        return _CompiledRule(
+            rule=rule,
+            match_mode=rule.when.match,
+            patterns=tuple(compiled),
+            union_regex=union_regex,
+        )
 
     def _to_hit(self, rule: Rule, evidence: Sequence[Evidence]) -> RuleHit:
         return RuleHit(
@@ -371,14 +643,120 @@ class RuleEngine:
             evidence=list(evidence),
         )
 
-    def _match_one(self, cp: _CompiledPattern, text: str, haystack: str) -> Iterable[Evidence]:
+    def _build_re2_set(self):
+        """
+        One RE2 set over every RE2-compatible regex of the pack: a single linear scan tells
+        which of them match anywhere, so the others skip their finditer. Needs 2+ members.
+        """
+        if re2 is None:
+            return None, ()
+        rx_set = re2.Set.SearchSet(_RE2_OPTIONS)
+        members: list[_CompiledPattern] = []
+        for cr in self._compiled:
+            for cp in cr.patterns:
+                if cp.kind != "regex_re2":
+                    continue
+                source = _re2_source(cp.raw.value, _compile_flags(cp.raw.flags))
+                if source is None:
+                    continue
+                try:
+                    rx_set.Add(source)
+                except re2.error:
+                    continue
+                members.append(cp)
+        if len(members) < 2:
+            return None, ()
+        rx_set.Compile()
+        return rx_set, tuple(members)
+
+    def _re2_set_misses(self, text: str, accel_safe: bool) -> frozenset[int] | None:
+        """ids of RE2-set patterns that cannot match text (None when there is no set)."""
+        if self._re2_set is None:
+            return None
+        matched = set(self._re2_set.Match(text) or ())  # Match() gives None when nothing matches
+        # Members that fall back to re on this text can't trust RE2's verdict.
+        return frozenset(
+            id(cp)
+            for i, cp in enumerate(self._re2_set_members)
+            if i not in matched and (accel_safe or cp.fallback is None)
+        )
+
+    def _build_keyword_automaton(self):
+        """
+        One Aho-Corasick automaton over every keyword of every rule (needs pyahocorasick).
+        Returns None when unavailable; keywords are then matched with str.find.
+        """
+        if ahocorasick is None:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for cr in self._compiled:
+            for cp in cr.patterns:
+                if cp.kind == "keyword" and cp.keyword:
+                    automaton.add_word(cp.keyword, cp.keyword)
+
+        if len(automaton) == 0:
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _scan_keywords(
+        self, haystack: str, max_per_keyword: int = _MAX_PER_KEYWORD
+    ) -> dict[str, list[tuple[int, int]]] | None:
+        """
+        Single pass over the haystack for all keywords at once.
+        Returns keyword -> spans with the same semantics as the str.find loop in
+        _find_keyword (leftmost, non-overlapping, at most max_per_keyword), or None
+        when no automaton is available.
+        """
+        if self._keyword_automaton is None:
+            return None
+
+        spans: dict[str, list[tuple[int, int]]] = {}
+        for end_idx, needle in self._keyword_automaton.iter(haystack):
+            found = spans.setdefault(needle, [])
+            if len(found) >= max_per_keyword:
+                continue
+            end = end_idx + 1
+            start = end - len(needle)
+            # Matches of one keyword arrive in start order; skip overlaps like str.find does.
+            if found and start < found[-1][1]:
+                continue
+            found.append((start, end))
+        return spans
+
+    def _match_one(
+        self,
+        cp: _CompiledPattern,
+        text: str,
+        haystack: str,
+        keyword_spans: dict[str, list[tuple[int, int]]] | None,
+        bigrams: set[str] | None,
+        re2_misses: frozenset[int] | None,
+        accel_safe: bool | None,
+        limit: int,
+    ) -> list[Evidence]:
+        """Evidence for one pattern; at most limit items (callers cap it at cp.cap)."""
         if cp.kind == "keyword":
             assert cp.keyword is not None
-            return self._find_keyword(text, haystack, cp.keyword, label=cp.raw.label, pattern=cp.raw.value)
+            if bigrams is not None and cp.keyword_prefix2 is not None and cp.keyword_prefix2 not in bigrams:
+                return []
+            if keyword_spans is not None:
+                return self._keyword_evidence(
+                    text, keyword_spans.get(cp.keyword, ())[:limit], label=cp.raw.label, pattern=cp.raw.value
+                )
+            return self._find_keyword(
+                text, haystack, cp.keyword, label=cp.raw.label, pattern=cp.raw.value, max_hits=limit
+            )
 
-        if cp.kind == "regex":
+        if cp.kind in ("regex", "regex_re2", "regex_pcre"):
             assert cp.regex is not None
-            return self._find_regex(text, cp.regex, label=cp.raw.label, pattern=cp.raw.value)
+            if re2_misses is not None and id(cp) in re2_misses:
+                return []
+            if cp.fallback is not None and accel_safe is None:
+                accel_safe = _accel_safe(text)
+            rx = cp.regex if cp.fallback is None or accel_safe else cp.fallback
+            return self._find_regex(text, rx, label=cp.raw.label, pattern=cp.raw.value, max_hits=limit)
 
         return []
 
@@ -390,9 +768,9 @@ class RuleEngine:
         *,
         label: str | None,
         pattern: str,
-        max_per_keyword: int = 8,
-    ) -> Iterable[Evidence]:
-        if not needle:
+        max_hits: int = _MAX_PER_KEYWORD,
+    ) -> list[Evidence]:
+        if not needle or max_hits <= 0:
             return []
 
         out: list[Evidence] = []
@@ -415,12 +793,33 @@ class RuleEngine:
                 )
             )
             count += 1
-            if count >= max_per_keyword:
+            if count >= max_hits:
                 break
             start = end
 
         return out
 
+    def _keyword_evidence(
+        self,
+        text: str,
+        spans: Iterable[tuple[int, int]],
+        *,
+        label: str | None,
+        pattern: str,
+    ) -> list[Evidence]:
+        return [
+            Evidence(
+                kind="keyword",
+                pattern=pattern,
+                match=text[s:e],
+                start=s,
+                end=e,
+                snippet=_snippet(text, s, e),
+                label=label,
+            )
+            for s, e in spans
+        ]
+
     def _find_regex(
         self,
         text: str,
@@ -428,9 +827,11 @@ class RuleEngine:
         *,
         label: str | None,
         pattern: str,
-        max_per_regex: int = 10,
-    ) -> Iterable[Evidence]:
+        max_hits: int = _MAX_PER_REGEX,
+    ) -> list[Evidence]:
         out: list[Evidence] = []
+        if max_hits <= 0:
+            return out
         for m in rx.finditer(text):
             s, e = m.span()
             if s == e:
@@ -446,6 +847,6 @@ class RuleEngine:
                     label=label,
                 )
             )
-            if len(out) >= max_per_regex:
+            if len(out) >= max_hits:
                 break
         return out
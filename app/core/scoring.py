@@ -5,14 +5,18 @@ from typing import Sequence
 
 from app.core.types import Action, AnalysisResult, RuleHit, Severity, TextHighlight
 
+# 100 * (1 - e^(-k/35)) rounded, for every reachable k; it is already 100 well before 511.
+_SCORE_TABLE: tuple[int, ...] = tuple(int(round(100 * (1 - math.exp(-k / 35)))) for k in range(512))
+
 
 def normalize_score(raw_points: int) -> int:
     """
     Convert raw weights sum to 0-100 with diminishing returns.
     """
-    raw_points = max(0, int(raw_points))
-    score = int(round(100 * (1 - math.exp(-raw_points / 35))))
-    return max(0, min(100, score))
+    raw_points = int(raw_points)
+    if raw_points <= 0:
+        return 0
+    return _SCORE_TABLE[min(raw_points, 511)]
 
 
 def severity_from_score(score: int) -> Severity:
@@ -23,31 +27,28 @@ def severity_from_score(score: int) -> Severity:
     return Severity.low
 
 
-_ACTION_PRIORITY: dict[Action, int] = {
-    Action.allow: 0,
-    Action.report: 1,
-    Action.verify_out_of_band: 2,
-    Action.block: 3,
+_BASE_ACTION: dict[Severity, Action] = {
+    Severity.low: Action.allow,
+    Severity.medium: Action.verify_out_of_band,
+    Severity.high: Action.block,
 }
 
 
+def _escalate(score_severity: Severity, top_hit_action: Action) -> Action:
+    # Ensure severity baseline is enforced
+    base = _BASE_ACTION[score_severity]
+    return top_hit_action if top_hit_action.rank > base.rank else base
+
+
 def choose_action(score_severity: Severity, hits: Sequence[RuleHit]) -> Action:
     """
     Base action by severity + escalation by the strongest hit action.
     """
-    base = {
-        Severity.low: Action.allow,
-        Severity.medium: Action.verify_out_of_band,
-        Severity.high: Action.block,
-    }[score_severity]
-
-    top = base
+    top = Action.allow
     for h in hits:
-        if _ACTION_PRIORITY[h.action] > _ACTION_PRIORITY[top]:
+        if h.action.rank > top.rank:
             top = h.action
-
-    # Ensure severity baseline is enforced
-    return top if _ACTION_PRIORITY[top] >= _ACTION_PRIORITY[base] else base
+    return _escalate(score_severity, top)
 
 
 def recommendations(action: Action, severity: Severity) -> list[str]:
@@ -67,12 +68,19 @@ def recommendations(action: Action, severity: Severity) -> list[str]:
 def build_highlights(hits: Sequence[RuleHit]) -> list[TextHighlight]:
     seen: set[tuple[int, int, str]] = set()
     out: list[TextHighlight] = []
+    # Evidence usually arrives in text order; only sort when it did not.
+    needs_sort = False
+    last_span = (-1, -1)
     for h in hits:
         for ev in h.evidence:
             key = (ev.start, ev.end, h.rule_id)
             if key in seen:
                 continue
             seen.add(key)
+            span = (ev.start, ev.end)
+            if span < last_span:
+                needs_sort = True
+            last_span = span
             out.append(
                 TextHighlight(
                     start=ev.start,
@@ -81,46 +89,39 @@ def build_highlights(hits: Sequence[RuleHit]) -> list[TextHighlight]:
                     label=h.title,
                 )
             )
-    out.sort(key=lambda x: (x.start, x.end))
+    if needs_sort:
+        out.sort(key=lambda x: (x.start, x.end))
     return out
 
 
-_SEVERITY_ORDER: dict[Severity, int] = {
-    Severity.low: 0,
-    Severity.medium: 1,
-    Severity.high: 2,
-}
-
-
-def _max_severity(hits: Sequence[RuleHit]) -> Severity:
-    """Return the highest severity among all hits."""
-    top = Severity.low
-    for h in hits:
-        if _SEVERITY_ORDER[h.severity] > _SEVERITY_ORDER[top]:
-            top = h.severity
-    return top
-
-
 def score_to_result(hits: Sequence[RuleHit]) -> AnalysisResult:
     # Count each rule once (avoid overweighting repeated matches of same rule)
-    unique = {}
+    unique: dict[str, RuleHit] = {}
     for h in hits:
         unique[h.rule_id] = h
 
     unique_hits = list(unique.values())
 
-    raw_points = sum(h.weight for h in unique_hits)
+    # Weight sum, strongest severity and strongest action in a single pass
+    raw_points = 0
+    sev_by_hits = Severity.low
+    top_action = Action.allow
+    for h in unique_hits:
+        raw_points += h.weight
+        if h.severity.rank > sev_by_hits.rank:
+            sev_by_hits = h.severity
+        if h.action.rank > top_action.rank:
+            top_action = h.action
+
     score = normalize_score(raw_points)
 
     # 1) Base severity by score
     sev_by_score = severity_from_score(score)
 
     # 2) Escalate by strongest hit severity (a single high-severity hit should not be low overall)
-    sev_by_hits = _max_severity(unique_hits)
-
-    sev = sev_by_hits if _SEVERITY_ORDER[sev_by_hits] > _SEVERITY_ORDER[sev_by_score] else sev_by_score
+    sev = sev_by_hits if sev_by_hits.rank > sev_by_score.rank else sev_by_score
 
-    act = choose_action(sev, unique_hits)
+    act = _escalate(sev, top_action)
 
     return AnalysisResult(
         score=score,
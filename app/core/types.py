@@ -1,22 +1,44 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Annotated, Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+if TYPE_CHECKING:
+    from typing_extensions import Self  # typing.Self needs Python 3.11
 
+
+# Enums serialize by value; `rank` gives each member an int order so hot paths compare
+# ints instead of looking members up in priority dicts.
 class Severity(str, Enum):
-    low = "low"
-    medium = "medium"
-    high = "high"
+    rank: int  # low < medium < high
+
+    def __new__(cls, value: str, rank: int) -> Self:
+        obj = str.__new__(cls, value)
+        obj._value_ = value
+        obj.rank = rank
+        return obj
+
+    low = "low", 0
+    medium = "medium", 1
+    high = "high", 2
 
 
 class Action(str, Enum):
-    allow = "allow"
-    verify_out_of_band = "verify_out_of_band"
-    report = "report"
-    block = "block"
+    rank: int  # strictness: allow < report < verify_out_of_band < block
+
+    def __new__(cls, value: str, rank: int) -> Self:
+        obj = str.__new__(cls, value)
+        obj._value_ = value
+        obj.rank = rank
+        return obj
+
+    allow = "allow", 0
+    verify_out_of_band = "verify_out_of_band", 2
+    report = "report", 1
+    block = "block", 3
 
 
 class PatternType(str, Enum):
@@ -113,66 +135,63 @@ class Rule(BaseModel):
         return list(v)
 
 
-class Evidence(BaseModel):
+# Evidence / RuleHit / TextHighlight are built many times per message by the engine,
+# so they are plain slotted dataclasses (no per-instance validation); Pydantic still
+# serializes them as part of AnalysisResult / AnalyzeResponse.
+# Invariants are checked with asserts (skipped under python -O); the Field()
+# annotations only keep the published JSON schema unchanged.
+
+_Offset = Annotated[int, Field(ge=0)]
+
+
+@dataclass(frozen=True, slots=True)
+class Evidence:
     """
     Concrete proof of why a rule hit.
     start/end are character offsets in the analyzed text.
     """
-    model_config = ConfigDict(extra="forbid", frozen=True)
-
     kind: Literal["keyword", "regex"]
     pattern: str
     match: str
-    start: int = Field(ge=0)
-    end: int = Field(ge=0)
+    start: _Offset
+    end: _Offset
     snippet: str
     label: str | None = None
 
-    @model_validator(mode="after")
-    def _validate_span(self) -> "Evidence":
-        if self.end < self.start:
-            raise ValueError("Evidence.end must be >= Evidence.start")
-        return self
+    def __post_init__(self) -> None:
+        assert 0 <= self.start <= self.end, "Evidence span must satisfy 0 <= start <= end"
 
 
-class RuleHit(BaseModel):
+@dataclass(frozen=True, slots=True)
+class RuleHit:
     """
     A single rule that matched + its evidence.
     """
-    model_config = ConfigDict(extra="forbid", frozen=True)
-
     rule_id: str
     title: str
     weight: int
     severity: Severity
     action: Action
     explain: str
-    tags: list[str] = Field(default_factory=list)
-    evidence: list[Evidence] = Field(default_factory=list)
+    tags: list[str] = field(default_factory=list)
+    evidence: list[Evidence] = field(default_factory=list)
 
-    @model_validator(mode="after")
-    def _ensure_evidence(self) -> "RuleHit":
-        if not self.evidence:
-            raise ValueError("RuleHit must include at least 1 evidence item")
-        return self
+    def __post_init__(self) -> None:
+        assert self.evidence, "RuleHit must include at least 1 evidence item"
 
 
-class TextHighlight(BaseModel):
+@dataclass(frozen=True, slots=True)
+class TextHighlight:
     """
     UI-friendly highlight span (derived from Evidence).
     """
-    model_config = ConfigDict(extra="forbid", frozen=True)
-
-    start: int = Field(ge=0)
-    end: int = Field(ge=0)
+    start: _Offset
+    end: _Offset
     rule_id: str
     label: str
 
-    @model_validator(mode="after")
-    def _validate_span(self) -> "TextHighlight":
-        if self.end < self.start:
-            raise ValueError("TextHighlight.end must be >= TextHighlight.start")
-        return self
+    def __post_init__(self) -> None:
+        assert 0 <= self.start <= self.end, "TextHighlight span must satisfy 0 <= start <= end"
 
 
 class AnalysisResult(BaseModel):
@@ -1,7 +1,9 @@
 # app/services/cache.py
 from __future__ import annotations
 
+import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any
 
@@ -14,41 +16,63 @@ class _Entry:
 
 class TTLCache:
     """
-    Tiny in-memory TTL cache.
+    Tiny in-memory TTL cache with LRU eviction.
     Good enough for local demo + avoids burning API quota.
     """
 
     def __init__(self, ttl_seconds: int = 3600, max_items: int = 2000) -> None:
         self.ttl = max(1, int(ttl_seconds))
         self.max_items = max(50, int(max_items))
-        self._data: dict[str, _Entry] = {}
+        # insertion order == recency order (oldest first); evict with popitem(last=False)
+        self._data: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
 
-    def get(self, key: str) -> Any | None:
+    def get(self, key: str, default: Any = None) -> Any | None:
+        """Return the cached value, or `default` on miss/expiry (lets callers cache None)."""
         now = time.time()
-        ent = self._data.get(key)
-        if not ent:
-            return None
-        if ent.expires_at <= now:
-            self._data.pop(key, None)
-            return None
-        return ent.value
-
-    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            ent = self._data.get(key)
+            if not ent:
+                return default
+            if ent.expires_at <= now:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return ent.value
+
+    def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
         now = time.time()
-        if len(self._data) >= self.max_items:
-            # drop oldest-ish (cheap cleanup)
-            self._purge(now, target_size=self.max_items // 2)
-        self._data[key] = _Entry(value=value, expires_at=now + self.ttl)
-
-    def _purge(self, now: float, target_size: int) -> None:
-        # remove expired first
-        expired = [k for k, v in self._data.items() if v.expires_at <= now]
-        for k in expired:
-            self._data.pop(k, None)
-
-        if len(self._data) <= target_size:
-            return
-
-        # remove arbitrary keys (simple)
-        for k in list(self._data.keys())[: max(0, len(self._data) - target_size)]:
-            self._data.pop(k, None)
+        ttl = self.ttl if ttl_seconds is None else max(1, int(ttl_seconds))
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            elif len(self._data) >= self.max_items:
+                # drop least recently used (expired entries age out the same way)
+                self._data.popitem(last=False)
+            self._data[key] = _Entry(value=value, expires_at=now + ttl)
+
+
+class TTLDiskCache:
+    """
+    TTLCache-compatible cache persisted on disk (sqlite via diskcache),
+    so reputation results survive process restarts and are shared by workers.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: int = 3600, size_limit: int = 64 * 1024 * 1024) -> None:
+        try:
+            import diskcache  # type: ignore
+        except Exception as e:
+            raise ImportError("Missing dependency: diskcache (pip install diskcache)") from e
+
+        self.ttl = max(1, int(ttl_seconds))
+        self._cache = diskcache.Cache(directory, size_limit=int(size_limit))
+
+    def get(self, key: str, default: Any = None) -> Any | None:
+        return self._cache.get(key, default=default)
+
+    def set(self, key: str, value: Any, ttl_seconds: int | None = None) -> None:
+        ttl = self.ttl if ttl_seconds is None else max(1, int(ttl_seconds))
+        self._cache.set(key, value, expire=ttl)
+
+    def close(self) -> None:
+        self._cache.close()
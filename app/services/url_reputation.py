@@ -1,15 +1,33 @@
 # app/services/url_reputation.py
 from __future__ import annotations
 
+import importlib.util
+import logging
 import os
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import Any
 
 import httpx
 
-from app.services.cache import TTLCache
+from app.services.cache import TTLCache, TTLDiskCache
 
+logger = logging.getLogger(__name__)
 
-@dataclass(frozen=True)
+# Unknown domains / VT errors are cached briefly so they are retried soon, but not per message.
+_NEGATIVE_TTL_SECONDS = 300
+_MISS = object()
+
+# Max concurrent VT requests per batch.
+_BATCH_CONCURRENCY = 8
+# httpx only speaks HTTP/2 with the optional h2 package (pip install "httpx[http2]").
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_VT_BASE_URL = "https://www.virustotal.com"
+
+
+@dataclass(frozen=True, slots=True)
 class ReputationResult:
     domain: str
     malicious: int
@@ -18,6 +36,33 @@ class ReputationResult:
     undetected: int
 
 
+def _default_cache() -> TTLCache | TTLDiskCache:
+    """Disk-backed cache when VT_CACHE_DIR is set, in-memory otherwise."""
+    cache_dir = os.getenv("VT_CACHE_DIR", "").strip()
+    if cache_dir:
+        try:
+            return TTLDiskCache(cache_dir, ttl_seconds=3600)
+        except ImportError:
+            logger.warning("VT_CACHE_DIR is set but diskcache is not installed; using in-memory cache")
+    return TTLCache(ttl_seconds=3600, max_items=2000)
+
+
+def _parse_result(domain: str, data: dict[str, Any]) -> ReputationResult:
+    stats = (
+        data.get("data", {})
+        .get("attributes", {})
+        .get("last_analysis_stats", {})
+    )
+
+    return ReputationResult(
+        domain=domain,
+        malicious=int(stats.get("malicious", 0) or 0),
+        suspicious=int(stats.get("suspicious", 0) or 0),
+        harmless=int(stats.get("harmless", 0) or 0),
+        undetected=int(stats.get("undetected", 0) or 0),
+    )
+
+
 class UrlReputationService:
     """
     VirusTotal reputation lookup (optional).
@@ -30,12 +75,53 @@ class UrlReputationService:
         *,
         api_key: str | None = None,
         timeout_seconds: float = 3.5,
-        cache: TTLCache | None = None,
+        cache: TTLCache | TTLDiskCache | None = None,
     ) -> None:
         self.api_key = api_key or os.getenv("VT_API_KEY") or ""
         self.enabled = bool(self.api_key.strip())
         self.timeout = float(timeout_seconds)
-        self.cache = cache or TTLCache(ttl_seconds=3600, max_items=2000)
+        self.cache = cache or _default_cache()
+        # One pooled keep-alive client for all lookups (batches fan out over a small thread
+        # pool), both created on first use and reused across messages.
+        self._client: httpx.Client | None = None
+        self._pool: ThreadPoolExecutor | None = None
+        self._client_lock = threading.Lock()
+
+    def _http(self) -> httpx.Client:
+        client = self._client
+        if client is None:
+            with self._client_lock:
+                client = self._client
+                if client is None:
+                    client = self._client = httpx.Client(
+                        base_url=_VT_BASE_URL,
+                        headers={"x-apikey": self.api_key},
+                        timeout=self.timeout,
+                        http2=_HTTP2,
+                        limits=httpx.Limits(max_keepalive_connections=10),
+                    )
+        return client
+
+    def _executor(self) -> ThreadPoolExecutor:
+        pool = self._pool
+        if pool is None:
+            with self._client_lock:
+                pool = self._pool
+                if pool is None:
+                    pool = self._pool = ThreadPoolExecutor(
+                        max_workers=_BATCH_CONCURRENCY, thread_name_prefix="vt-lookup"
+                    )
+        return pool
+
+    def close(self) -> None:
+        """Close the pooled HTTP client and batch threads (a later lookup opens new ones)."""
+        with self._client_lock:
+            client, self._client = self._client, None
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if client is not None:
+            client.close()
 
     def lookup_domain(self, domain: str) -> ReputationResult | None:
         d = (domain or "").strip().lower()
@@ -43,40 +129,49 @@ class UrlReputationService:
             return None
 
         cache_key = f"vt:domain:{d}"
-        cached = self.cache.get(cache_key)
-        if cached is not None:
+        cached = self.cache.get(cache_key, _MISS)
+        if cached is not _MISS:
             return cached
 
-        url = f"https://www.virustotal.com/api/v3/domains/{d}"
-        headers = {"x-apikey": self.api_key}
-
         try:
-            with httpx.Client(timeout=self.timeout) as client:
-                r = client.get(url, headers=headers)
-                if r.status_code == 404:
-                    # unknown domain: treat as no intel (do not penalize)
-                    self.cache.set(cache_key, None)
-                    return None
-                r.raise_for_status()
-                data = r.json()
+            r = self._http().get(f"/api/v3/domains/{d}")
+            if r.status_code == 404:
+                # unknown domain: treat as no intel (do not penalize)
+                self.cache.set(cache_key, None, ttl_seconds=_NEGATIVE_TTL_SECONDS)
+                return None
+            r.raise_for_status()
+            data = r.json()
         except Exception:
             # If VT is down / blocked / rate-limited, fail closed (no intel) but don't break analysis
-            self.cache.set(cache_key, None)
+            self.cache.set(cache_key, None, ttl_seconds=_NEGATIVE_TTL_SECONDS)
             return None
 
-        stats = (
-            data.get("data", {})
-            .get("attributes", {})
-            .get("last_analysis_stats", {})
-        )
-
-        res = ReputationResult(
-            domain=d,
-            malicious=int(stats.get("malicious", 0) or 0),
-            suspicious=int(stats.get("suspicious", 0) or 0),
-            harmless=int(stats.get("harmless", 0) or 0),
-            undetected=int(stats.get("undetected", 0) or 0),
-        )
-
+        res = _parse_result(d, data)
         self.cache.set(cache_key, res)
         return res
+
+    def lookup_domains(self, domains: Iterable[str]) -> dict[str, ReputationResult | None]:
+        """
+        Batch variant of lookup_domain: cache misses are fetched concurrently over the
+        pooled client (at most _BATCH_CONCURRENCY requests in flight).
+        Returns normalized domain -> result (None = no intel), in input order.
+        """
+        wanted = list(dict.fromkeys(d for d in ((x or "").strip().lower() for x in domains) if d))
+        if not self.enabled:
+            return dict.fromkeys(wanted)
+
+        out: dict[str, ReputationResult | None] = {}
+        missing: list[str] = []
+        for d in wanted:
+            cached = self.cache.get(f"vt:domain:{d}", _MISS)
+            if cached is _MISS:
+                missing.append(d)
+            out[d] = None if cached is _MISS else cached
+
+        if len(missing) == 1:
+            out[missing[0]] = self.lookup_domain(missing[0])
+        elif missing:
+            # lookup_domain caches each result (404s/errors with the negative TTL).
+            out.update(zip(missing, self._executor().map(self.lookup_domain, missing)))
+
+        return out
@@ -1,23 +1,52 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 # We intentionally keep normalization "index-safe":
 # do not remove chars (it breaks spans), only replace with same-length placeholders.
-_ZERO_WIDTH = {
-    "\u200b",  # zero width space
-    "\u200c",  # zero width non-joiner
-    "\u200d",  # zero width joiner
-    "\ufeff",  # BOM / zero width no-break space
-}
+_ZW_ORDS: frozenset[int] = frozenset(
+    {
+        0x200B,  # zero width space
+        0x200C,  # zero width non-joiner
+        0x200D,  # zero width joiner
+        0xFEFF,  # BOM / zero width no-break space
+    }
+)
+_ZW_TABLE = str.maketrans(dict.fromkeys(_ZW_ORDS, " "))
+_ZW_CHARS = tuple(map(chr, sorted(_ZW_ORDS)))
+
+# Short messages (and resubmitted ones) repeat a lot in batch/stream use; long bodies
+# rarely do and would only bloat the cache, so they bypass it.
+_CACHE_MAX_LEN = 4096
 
 
 def normalize_for_matching(text: str) -> str:
     """
     Lowercases and replaces zero-width characters with spaces.
     Keeps length stable so offsets (spans) still match the original text.
+    The result is always lowercase; callers search it with pre-lowercased needles.
     """
     if not text:
         return ""
-    out = []
-    for ch in text:
-        out.append(" " if ch in _ZERO_WIDTH else ch)
-    return "".join(out).lower()
+    if len(text) > _CACHE_MAX_LEN:
+        return _normalize_impl(text)
+    return _normalize_cached(text)
+
+
+def clear_norm_cache() -> None:
+    _normalize_cached.cache_clear()
+
+
+def _normalize_impl(text: str) -> str:
+    if text.isascii():
+        # Fast path for plain-English bodies: isascii() is O(1) (PEP 393 records it),
+        # and ASCII text cannot contain zero-width chars, so the scans below are skipped.
+        return text if text.islower() else text.lower()
+    if not any(z in text for z in _ZW_CHARS):
+        # Common case: nothing to replace, so a single lower() pass (none if already lowercase).
+        # islower() is False for text without cased chars; lower() then just copies it.
+        return text if text.islower() else text.lower()
+    return text.translate(_ZW_TABLE).lower()
+
+
+_normalize_cached = lru_cache(maxsize=2048)(_normalize_impl)
@@ -0,0 +1,9 @@
+import pytest
+
+from app.core.analyzer import Analyzer, get_default_analyzer
+
+
+@pytest.fixture(scope="session")
+def analyzer() -> Analyzer:
+    """One Analyzer (default rule pack) for the whole test session; patch it via monkeypatch only."""
+    return get_default_analyzer()
@@ -0,0 +1,86 @@
+"""
+API tests for the FastAPI app (routes + lifespan wiring).
+"""
+import gc
+import weakref
+
+from fastapi.testclient import TestClient
+
+from app.api.main import create_app
+from app.api.routes import _rules_json, get_analyzer
+from app.core.analyzer import Analyzer
+
+
+def test_lifespan_warms_analyzer():
+    """The analyzer is built at startup, not on the first request."""
+    app = create_app()
+    with TestClient(app):
+        assert app.state.analyzer is get_analyzer()
+        assert app.state.analyze_limiter.total_tokens >= 1
+
+
+def test_analyze_endpoint():
+    with TestClient(create_app()) as client:
+        r = client.post(
+            "/analyze",
+            json={"subject": "Urgent", "body": "Verify here: https://bit.ly/abc123"},
+        )
+    assert r.status_code == 200
+    data = r.json()
+    assert data["score"] > 0
+    assert "CTX-URL-SHORTENER" in {h["rule_id"] for h in data["hits"]}
+    assert data["highlights"]
+
+
+def test_analyze_response_shape_and_schema():
+    """Fields match the AnalyzeResponse contract, which stays documented in OpenAPI."""
+    app = create_app()
+    with TestClient(app) as client:
+        r = client.post("/analyze", json={"body": "Your OTP code: 1234 - urgent"})
+        schema = client.get("/openapi.json").json()
+    assert set(r.json()) == {"score", "severity", "action", "recommendations", "hits", "highlights"}
+    ok = schema["paths"]["/analyze"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ok["$ref"].endswith("/AnalyzeResponse")
+
+
+def test_analyze_without_lifespan_falls_back():
+    """Without the lifespan (no `with`), routes still use the cached analyzer."""
+    client = TestClient(create_app())
+    r = client.post("/analyze", json={"body": "hello"})
+    assert r.status_code == 200
+
+
+def test_rules_endpoint():
+    with TestClient(create_app()) as client:
+        r = client.get("/rules")
+    assert r.status_code == 200
+    rules = r.json()
+    assert "PHISH-001" in {rule["id"] for rule in rules}
+    assert set(rules[0]) == {"id", "title", "weight", "severity", "tags"}
+
+
+def test_rules_schema_unchanged():
+    schema = create_app().openapi()
+    ok = schema["paths"]["/rules"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ok["title"] == "Response List Rules Rules Get"
+    assert ok["items"]["$ref"].endswith("/RuleSummary")
+
+
+def test_rules_payload_cached_per_analyzer():
+    analyzer = get_analyzer()
+    assert _rules_json(analyzer) is _rules_json(analyzer)
+
+
+def test_rules_payload_does_not_keep_analyzer_alive():
+    analyzer = Analyzer()
+    _rules_json(analyzer)
+    ref = weakref.ref(analyzer)
+    del analyzer
+    gc.collect()
+    assert ref() is None
+
+
+def test_analyze_rejects_empty_request():
+    with TestClient(create_app()) as client:
+        r = client.post("/analyze", json={})
+    assert r.status_code == 422
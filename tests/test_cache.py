@@ -0,0 +1,134 @@
+import httpx
+import pytest
+
+from app.services import cache as cache_mod
+from app.services import url_reputation
+from app.services.cache import TTLCache, TTLDiskCache
+from app.services.url_reputation import ReputationResult, UrlReputationService
+
+
+def test_lru_evicts_least_recently_used():
+    c = TTLCache(ttl_seconds=60, max_items=50)
+    for i in range(50):
+        c.set(f"k{i}", i)
+
+    assert c.get("k0") == 0  # touch -> most recent
+    c.set("new", "x")
+
+    assert c.get("k1") is None  # oldest untouched entry was evicted
+    assert c.get("k0") == 0
+    assert c.get("new") == "x"
+    assert len(c._data) == 50
+
+
+def test_overwrite_does_not_evict():
+    c = TTLCache(ttl_seconds=60, max_items=50)
+    for i in range(50):
+        c.set(f"k{i}", i)
+    c.set("k10", "updated")
+    assert c.get("k0") == 0
+    assert c.get("k10") == "updated"
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    c = TTLCache(ttl_seconds=10)
+    c.set("a", 1)
+    now[0] += 9
+    assert c.get("a") == 1
+    now[0] += 2
+    assert c.get("a") is None
+    assert "a" not in c._data
+
+
+def test_cached_none_is_distinguishable_from_miss():
+    c = TTLCache()
+    miss = object()
+    assert c.get("neg", miss) is miss
+    c.set("neg", None)
+    assert c.get("neg", miss) is None
+
+
+def test_per_entry_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    c = TTLCache(ttl_seconds=3600)
+    c.set("short", None, ttl_seconds=5)
+    c.set("long", 1)
+    now[0] += 6
+    assert c.get("short", "miss") == "miss"
+    assert c.get("long") == 1
+
+
+def test_disk_cache_persists_across_instances(tmp_path):
+    pytest.importorskip("diskcache")
+    first = TTLDiskCache(str(tmp_path), ttl_seconds=60)
+    first.set("vt:domain:example.com", {"malicious": 1})
+    first.set("vt:domain:unknown.test", None, ttl_seconds=5)
+    first.close()
+
+    second = TTLDiskCache(str(tmp_path), ttl_seconds=60)
+    assert second.get("vt:domain:example.com") == {"malicious": 1}
+    assert second.get("vt:domain:unknown.test", "miss") is None
+    assert second.get("vt:domain:other.test", "miss") == "miss"
+    second.close()
+
+
+def test_disk_cache_round_trips_reputation_results(tmp_path):
+    pytest.importorskip("diskcache")
+    result = ReputationResult(domain="example.com", malicious=1, suspicious=0, harmless=5, undetected=2)
+    c = TTLDiskCache(str(tmp_path), ttl_seconds=60)
+    c.set("vt:domain:example.com", result)
+    assert c.get("vt:domain:example.com") == result
+    assert not hasattr(result, "__dict__")
+    c.close()
+
+
+def test_reputation_uses_disk_cache_when_configured(tmp_path, monkeypatch):
+    pytest.importorskip("diskcache")
+    monkeypatch.setenv("VT_CACHE_DIR", str(tmp_path))
+    svc = UrlReputationService(api_key="dummy")
+    assert isinstance(svc.cache, TTLDiskCache)
+    svc.cache.close()
+
+
+def test_negative_reputation_result_is_cached(monkeypatch):
+    calls = []
+
+    class _FailingClient:
+        def __init__(self, *args, **kwargs):
+            calls.append(1)
+            raise httpx.ConnectError("offline")
+
+    monkeypatch.delenv("VT_CACHE_DIR", raising=False)
+    monkeypatch.setattr(url_reputation.httpx, "Client", _FailingClient)
+    svc = UrlReputationService(api_key="dummy")
+    assert svc.lookup_domain("example.com") is None
+    assert svc.lookup_domain("example.com") is None
+    assert len(calls) == 1
+
+
+def test_reputation_reuses_one_http_client(monkeypatch):
+    created = []
+    real_client = httpx.Client
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["x-apikey"] == "dummy"
+        return httpx.Response(200, json={"data": {"attributes": {"last_analysis_stats": {"malicious": 1}}}})
+
+    def make_client(**kw):
+        created.append(kw)
+        return real_client(transport=httpx.MockTransport(handler), **kw)
+
+    monkeypatch.delenv("VT_CACHE_DIR", raising=False)
+    monkeypatch.setattr(url_reputation.httpx, "Client", make_client)
+    svc = UrlReputationService(api_key="dummy")
+    assert svc.lookup_domain("a.example").malicious == 1
+    assert svc.lookup_domain("b.example").malicious == 1
+    assert len(created) == 1
+
+    svc.close()
+    assert svc.lookup_domain("c.example").malicious == 1
+    assert len(created) == 2
+    svc.close()
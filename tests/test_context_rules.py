@@ -4,13 +4,11 @@ Tests for context-aware rules (CTX-* rules).
 These rules use pre-extracted artifacts (URLs, domains) to detect
 phishing signals that are hard to express in pure regex.
 """
-from app.core.analyzer import Analyzer
 
 
-def test_ctx_url_shortener_hit():
+def test_ctx_url_shortener_hit(analyzer):
     """URL shortener domains (bit.ly, t.co, etc.) should trigger CTX-URL-SHORTENER."""
-    a = Analyzer()
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Hi",
         body="Please verify here: https://bit.ly/abc123",
         from_email="it-support@example.com",
@@ -19,10 +17,9 @@ def test_ctx_url_shortener_hit():
     assert "CTX-URL-SHORTENER" in ids
 
 
-def test_ctx_url_punycode_hit():
+def test_ctx_url_punycode_hit(analyzer):
     """Punycode/IDN domains (xn--) should trigger CTX-URL-PUNYCODE."""
-    a = Analyzer()
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Security Update",
         body="Open: https://xn--pple-43d.com/login",
         from_email="support@example.com",
@@ -31,10 +28,9 @@ def test_ctx_url_punycode_hit():
     assert "CTX-URL-PUNYCODE" in ids
 
 
-def test_ctx_url_many_subdomains_hit():
+def test_ctx_url_many_subdomains_hit(analyzer):
     """Deep subdomain chains (5+ levels) should trigger CTX-URL-SUBDOMAINS."""
-    a = Analyzer()
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Account",
         body="Login: https://a.b.c.d.e.example.com/auth",
         from_email="support@example.com",
@@ -43,10 +39,9 @@ def test_ctx_url_many_subdomains_hit():
     assert "CTX-URL-SUBDOMAINS" in ids
 
 
-def test_normal_url_no_ctx_hit():
+def test_normal_url_no_ctx_hit(analyzer):
     """Normal URLs should not trigger context rules."""
-    a = Analyzer()
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Meeting",
         body="See details at https://www.google.com/calendar",
         from_email="colleague@company.com",
@@ -54,3 +49,12 @@ def test_normal_url_no_ctx_hit():
     ctx_ids = {h.rule_id for h in res.hits if h.rule_id.startswith("CTX-")}
     assert len(ctx_ids) == 0
 
+
+
+def test_ctx_evidence_span_with_length_changing_lowercase(analyzer):
+    """Evidence spans use the URL's own length even when lower() makes it longer."""
+    res = analyzer.analyze(body="go https://bit.ly/abc\u0130 now")
+    hit = next(h for h in res.hits if h.rule_id == "CTX-URL-SHORTENER")
+    ev = hit.evidence[0]
+    assert ev.match == "https://bit.ly/abc\u0130"
+    assert ev.end - ev.start == len(ev.match)
@@ -1,4 +1,6 @@
 from app.core.extractors import (
+    classify_domain,
+    extract_all,
     extract_urls,
     extract_domains,
     extract_emails,
@@ -13,6 +15,15 @@ def test_extract_urls_trims_punctuation_and_wrappers():
     urls = extract_urls(text)
     assert urls == ["https://example.com/path?a=1", "https://x.com/abc"]
 
+def test_extract_urls_trims_mixed_trailing_noise():
+    text = 'See [https://a.com/x).,]" and https://b.com/y?q=1!)… and (https://c.com/z).'
+    urls = extract_urls(text)
+    assert urls == ["https://a.com/x", "https://b.com/y?q=1!", "https://c.com/z"]
+
+def test_extract_urls_keeps_inner_parentheses_and_commas():
+    text = "See https://x.com/a(b)c and https://y.com/p,q;r now"
+    assert extract_urls(text) == ["https://x.com/a(b)c", "https://y.com/p,q;r"]
+
 def test_extract_domains_normalizes_www_and_ports():
     urls = ["https://www.Example.com:443/a", "http://sub.example.com/b"]
     domains = extract_domains(urls)
@@ -23,14 +34,64 @@ def test_extract_emails_unique_lowercase():
     emails = extract_emails(text)
     assert emails == ["admin@example.com"]
 
+def test_domains_and_emails_are_interned():
+    first = extract_all("https://Intern-Test.example/a admin@Intern-Test.example")
+    second = extract_all("see http://www.intern-test.example/b or ADMIN@intern-test.example")
+    assert first.domains[0] is second.domains[0]
+    assert first.emails[0] is second.emails[0]
+
 def test_extract_phones_conservative():
     text = "Call +1 (212) 555-1234 or 03-555-1234. Ref: 12345"
     phones = extract_phones(text)
     assert "+12125551234" in phones or "12125551234" in phones
     assert any(p.endswith("035551234") or p.endswith("35551234") for p in phones)
 
+def test_non_ascii_case_folding_matches_re():
+    # re.IGNORECASE lets 'İ' match [a-z]; the kind prefilter must not drop it.
+    assert extract_all("mail: \u0130nfo@corp.com").emails == ["i\u0307nfo@corp.com"]
+
 def test_helpers():
     assert is_shortener_domain("bit.ly")
     assert is_shortener_domain("www.t.co")
     assert is_punycode_domain("xn--pple-43d.com")
     assert subdomain_count("a.b.c.example.com") == 5
+    assert subdomain_count(".a..b.example.com.") == 4
+    assert subdomain_count("") == 0
+
+def test_extractor_patterns_compiled_once_at_import(monkeypatch):
+    from app.core import extractors
+
+    # Every pattern is a module-level compiled constant: extraction never touches `re`.
+    monkeypatch.setattr(extractors, "re", None)
+    art = extract_all("see https://a.com and mail b@c.com or call +972-50-123-4567")
+    assert (art.urls, art.emails, art.phones) == (["https://a.com"], ["b@c.com"], ["+972501234567"])
+    extract_urls("https://a.com")
+    extract_emails("b@c.com")
+    extract_phones("+972-50-123-4567")
+
+def test_nested_artifacts_are_reported_for_each_kind():
+    art = extract_all("https://evil.com/login?user=victim@corp.com or https://x.com/call/0501234567/now")
+    assert art.urls == ["https://evil.com/login?user=victim@corp.com", "https://x.com/call/0501234567/now"]
+    assert art.emails == ["victim@corp.com"]
+    assert art.phones == ["0501234567"]
+
+    art = extract_all("reply to 0501234567@corp.com")
+    assert art.emails == ["0501234567@corp.com"]
+    assert art.phones == ["0501234567"]
+
+def test_classify_domain_matches_individual_helpers():
+    for d in ["bit.ly", "WWW.Bit.ly", " www.tinyurl.com ", "xn--pypal-4ve.com", "a.b.c.d.e.example.com",
+              ".a..b.example.com.", "", "example.com"]:
+        assert classify_domain(d) == (is_shortener_domain(d), is_punycode_domain(d), subdomain_count(d))
+
+def test_extract_all_matches_individual_extractors():
+    text = "Mail Admin@Example.com, open https://www.example.com/a or call +1 (212) 555-1234"
+    art = extract_all(text)
+    assert art.urls == extract_urls(text)
+    assert art.domains == ["example.com"]
+    assert art.emails == ["admin@example.com"]
+    assert art.phones == extract_phones(text)
+
+def test_extract_all_plain_text_is_empty():
+    art = extract_all("שלום, נתראה מחר בפגישה.")
+    assert (art.urls, art.domains, art.emails, art.phones) == ([], [], [], [])
@@ -3,26 +3,26 @@ Tests for CTX-URL-REPUTATION rule.
 
 Uses monkeypatching to avoid real API calls.
 """
-from app.core.analyzer import Analyzer
 from app.services.url_reputation import ReputationResult
 
 
-def test_reputation_rule_monkeypatched(monkeypatch):
+def test_reputation_rule_monkeypatched(analyzer, monkeypatch):
     """Test that malicious domains trigger CTX-URL-REPUTATION rule."""
-    a = Analyzer()
-
     # Patch the engine's internal reputation service
-    rep = a.engine._reputation  # type: ignore[attr-defined]
-    rep.enabled = True
+    rep = analyzer.engine._reputation  # type: ignore[attr-defined]
+    monkeypatch.setattr(rep, "enabled", True)
 
-    def fake_lookup(domain: str):
-        if domain == "bad.example":
-            return ReputationResult(domain=domain, malicious=2, suspicious=0, harmless=0, undetected=0)
-        return None
+    def fake_lookup_domains(domains):
+        return {
+            d: ReputationResult(domain=d, malicious=2, suspicious=0, harmless=0, undetected=0)
+            if d == "bad.example"
+            else None
+            for d in domains
+        }
 
-    monkeypatch.setattr(rep, "lookup_domain", fake_lookup)
+    monkeypatch.setattr(rep, "lookup_domains", fake_lookup_domains)
 
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Hi",
         body="Go to https://bad.example/login",
         from_email="support@example.com",
@@ -33,21 +33,22 @@ def test_reputation_rule_monkeypatched(monkeypatch):
     assert res.score >= 1
 
 
-def test_reputation_rule_suspicious_domain(monkeypatch):
+def test_reputation_rule_suspicious_domain(analyzer, monkeypatch):
     """Test that suspicious (not malicious) domains also trigger the rule with lower weight."""
-    a = Analyzer()
-
-    rep = a.engine._reputation  # type: ignore[attr-defined]
-    rep.enabled = True
+    rep = analyzer.engine._reputation  # type: ignore[attr-defined]
+    monkeypatch.setattr(rep, "enabled", True)
 
-    def fake_lookup(domain: str):
-        if domain == "suspicious.example":
-            return ReputationResult(domain=domain, malicious=0, suspicious=3, harmless=10, undetected=5)
-        return None
+    def fake_lookup_domains(domains):
+        return {
+            d: ReputationResult(domain=d, malicious=0, suspicious=3, harmless=10, undetected=5)
+            if d == "suspicious.example"
+            else None
+            for d in domains
+        }
 
-    monkeypatch.setattr(rep, "lookup_domain", fake_lookup)
+    monkeypatch.setattr(rep, "lookup_domains", fake_lookup_domains)
 
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Check this",
         body="Visit https://suspicious.example/page",
         from_email="info@company.com",
@@ -61,14 +62,12 @@ def test_reputation_rule_suspicious_domain(monkeypatch):
     assert rep_hit.weight == 18
 
 
-def test_reputation_rule_disabled_no_hit(monkeypatch):
+def test_reputation_rule_disabled_no_hit(analyzer, monkeypatch):
     """When reputation service is disabled, no CTX-URL-REPUTATION hit should occur."""
-    a = Analyzer()
-
-    rep = a.engine._reputation  # type: ignore[attr-defined]
-    rep.enabled = False  # Disabled
+    rep = analyzer.engine._reputation  # type: ignore[attr-defined]
+    monkeypatch.setattr(rep, "enabled", False)  # Disabled
 
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Hi",
         body="Go to https://bad.example/login",
         from_email="support@example.com",
@@ -78,20 +77,18 @@ def test_reputation_rule_disabled_no_hit(monkeypatch):
     assert "CTX-URL-REPUTATION" not in ids
 
 
-def test_reputation_rule_clean_domain_no_hit(monkeypatch):
+def test_reputation_rule_clean_domain_no_hit(analyzer, monkeypatch):
     """Clean domains should not trigger CTX-URL-REPUTATION."""
-    a = Analyzer()
+    rep = analyzer.engine._reputation  # type: ignore[attr-defined]
+    monkeypatch.setattr(rep, "enabled", True)
 
-    rep = a.engine._reputation  # type: ignore[attr-defined]
-    rep.enabled = True
-
-    def fake_lookup(domain: str):
+    def fake_lookup_domains(domains):
         # All domains are clean
-        return ReputationResult(domain=domain, malicious=0, suspicious=0, harmless=50, undetected=10)
+        return {d: ReputationResult(domain=d, malicious=0, suspicious=0, harmless=50, undetected=10) for d in domains}
 
-    monkeypatch.setattr(rep, "lookup_domain", fake_lookup)
+    monkeypatch.setattr(rep, "lookup_domains", fake_lookup_domains)
 
-    res = a.analyze(
+    res = analyzer.analyze(
         subject="Newsletter",
         body="Read more at https://clean.example/article",
         from_email="news@company.com",
@@ -100,3 +97,69 @@ def test_reputation_rule_clean_domain_no_hit(monkeypatch):
     ids = {h.rule_id for h in res.hits}
     assert "CTX-URL-REPUTATION" not in ids
 
+
+def test_reputation_not_queried_without_urls(analyzer, monkeypatch):
+    """URL-less mail skips the context rules, including the reputation lookup."""
+    rep = analyzer.engine._reputation  # type: ignore[attr-defined]
+    monkeypatch.setattr(rep, "enabled", True)
+
+    def fail_lookup(domains):
+        raise AssertionError("reputation must not be queried without URLs")
+
+    monkeypatch.setattr(rep, "lookup_domains", fail_lookup)
+
+    res = analyzer.analyze(subject="Lunch", body="See you at noon", from_email="team@company.com")
+    assert not any(h.rule_id.startswith("CTX-") for h in res.hits)
+
+
+def test_lookup_domains_batches_cache_misses(monkeypatch):
+    """Cache misses are fetched concurrently on one pooled client; hits and duplicates are not re-fetched."""
+    import httpx
+
+    from app.services import url_reputation
+    from app.services.cache import TTLCache
+    from app.services.url_reputation import UrlReputationService
+
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        domain = request.url.path.rsplit("/", 1)[-1]
+        requested.append(domain)
+        if domain == "unknown.example":
+            return httpx.Response(404)
+        stats = {"malicious": 1 if domain == "bad.example" else 0}
+        return httpx.Response(200, json={"data": {"attributes": {"last_analysis_stats": stats}}})
+
+    clients = []
+    real_client = httpx.Client
+
+    def make_client(**kw):
+        clients.append(real_client(transport=httpx.MockTransport(handler), **kw))
+        return clients[-1]
+
+    monkeypatch.setattr(url_reputation.httpx, "Client", make_client)
+
+    svc = UrlReputationService(api_key="dummy", cache=TTLCache())
+    cached = ReputationResult(domain="cached.example", malicious=0, suspicious=1, harmless=0, undetected=0)
+    svc.cache.set("vt:domain:cached.example", cached)
+
+    out = svc.lookup_domains(["Bad.example", "cached.example", "ok.example", "bad.example", "unknown.example"])
+
+    assert list(out) == ["bad.example", "cached.example", "ok.example", "unknown.example"]
+    assert out["bad.example"].malicious == 1
+    assert out["cached.example"] is cached
+    assert out["ok.example"].malicious == 0
+    assert out["unknown.example"] is None
+    assert sorted(requested) == ["bad.example", "ok.example", "unknown.example"]
+
+    # Everything (including the 404) is now cached.
+    svc.lookup_domains(["bad.example", "unknown.example"])
+    assert len(requested) == 3
+
+    # A later batch reuses the same client; close() releases it and the threads.
+    svc.lookup_domains(["a.example", "b.example"])
+    assert len(requested) == 5
+    assert len(clients) == 1
+    svc.close()
+    assert clients[0].is_closed
+    assert svc._pool is None
@@ -0,0 +1,264 @@
+"""
+Smoke tests for RuleEngine matching on small in-memory rule packs.
+"""
+import pytest
+
+from app.core import rule_engine
+from app.core.context import AnalysisContext
+from app.core.rule_engine import RuleEngine
+from app.core.types import Rule
+
+
+def _rule(rule_id: str, when: dict, **extra) -> Rule:
+    data = {
+        "id": rule_id,
+        "title": f"Rule {rule_id}",
+        "weight": 5,
+        "severity": "low",
+        "when": when,
+        "explain": "test rule",
+        "action": "allow",
+    }
+    data.update(extra)
+    return Rule.model_validate(data)
+
+
+def test_keyword_spans_are_case_insensitive_and_non_overlapping():
+    engine = RuleEngine([_rule("KW-001", {"any_keywords": ["aa", "Verify"]})])
+    hits = engine.match("aaaaa VERIFY now")
+    assert len(hits) == 1
+    spans = [(ev.start, ev.end, ev.match) for ev in hits[0].evidence]
+    assert spans == [(0, 2, "aa"), (2, 4, "aa"), (6, 12, "VERIFY")]
+
+
+def test_keyword_evidence_capped_per_keyword():
+    engine = RuleEngine([_rule("KW-002", {"any_keywords": ["urgent"]})])
+    hits = engine.match("urgent " * 20)
+    assert len(hits[0].evidence) == 8
+
+
+def test_shared_keyword_across_rules():
+    engine = RuleEngine(
+        [
+            _rule("KW-003", {"any_keywords": ["refund"]}),
+            _rule("KW-004", {"match": "all", "any_keywords": ["refund", "wire transfer"]}),
+        ]
+    )
+    assert {h.rule_id for h in engine.match("Your refund is ready")} == {"KW-003"}
+    ids = {h.rule_id for h in engine.match("Refund via wire transfer")}
+    assert ids == {"KW-003", "KW-004"}
+
+
+def test_regex_union_attributes_evidence_to_each_pattern(monkeypatch):
+    # Without the accel extra every regex stays on re, so "any" rules get a union.
+    monkeypatch.setattr(rule_engine, "_compile_re2", lambda value, flags: None)
+    monkeypatch.setattr(rule_engine, "_compile_pcre2", lambda value, flags: None)
+    engine = RuleEngine(
+        [
+            _rule(
+                "RX-001",
+                {
+                    "patterns": [
+                        {"type": "regex", "value": r"\bpassword\b", "flags": "im", "label": "pw"},
+                        {"type": "keyword", "value": "bank", "label": "kw"},
+                        {"type": "regex", "value": r"\botp\b", "flags": "im", "label": "otp"},
+                    ]
+                },
+            )
+        ]
+    )
+    assert engine._compiled[0].union_regex is not None
+
+    hits = engine.match("OTP then password, bank, password")
+    labels = [(ev.label, ev.start) for ev in hits[0].evidence]
+    # Evidence stays grouped in pattern order, positions ascending within a pattern.
+    assert labels == [("pw", 9), ("pw", 25), ("kw", 19), ("otp", 0)]
+    assert engine.match("nothing relevant here") == []
+
+
+def test_regex_union_keeps_overlapping_evidence(monkeypatch):
+    monkeypatch.setattr(rule_engine, "_compile_re2", lambda value, flags: None)
+    monkeypatch.setattr(rule_engine, "_compile_pcre2", lambda value, flags: None)
+    engine = RuleEngine([_rule("RX-008", {"regex": [r"verify\s+account", "account"]})])
+    assert engine._compiled[0].union_regex is not None
+
+    hits = engine.match("Please verify account now")
+    assert [(ev.match, ev.start, ev.end) for ev in hits[0].evidence] == [
+        ("verify account", 7, 21),
+        ("account", 14, 21),
+    ]
+
+
+def test_regex_union_skipped_for_mixed_flags_and_backrefs():
+    mixed = _rule("RX-002", {"patterns": [
+        {"type": "regex", "value": "abc", "flags": "i"},
+        {"type": "regex", "value": "def", "flags": "m"},
+    ]})
+    backref = _rule("RX-003", {"regex": [r"(a)\1", "xyz"]})
+    engine = RuleEngine([mixed, backref])
+    assert all(cr.union_regex is None for cr in engine._compiled)
+    assert {h.rule_id for h in engine.match("ABC aa")} == {"RX-002", "RX-003"}
+
+
+def test_re2_only_used_for_patterns_with_identical_semantics():
+    pytest.importorskip("re2")
+    engine = RuleEngine(
+        [
+            _rule("RX-004", {"patterns": [
+                {"type": "regex", "value": "paypa[il1]", "flags": "i", "label": "re2"},
+                {"type": "regex", "value": r"\bsupport\b", "flags": "i", "label": "unicode_b"},
+                {"type": "regex", "value": "(?<=x)y", "flags": "i", "label": "lookbehind"},
+            ]})
+        ]
+    )
+    kinds = [cp.kind for cp in engine._compiled[0].patterns]
+    assert kinds[0] == "regex_re2" and "regex_re2" not in kinds[1:]
+
+    hits = engine.match("שלום PayPal1 xy")
+    assert [(ev.label, ev.start, ev.end) for ev in hits[0].evidence] == [("re2", 5, 11), ("lookbehind", 14, 15)]
+
+
+
+def _plain_re_engine(monkeypatch, rules):
+    """Same rules with every regex on Python's re (the reference semantics)."""
+    with monkeypatch.context() as m:
+        m.setattr(rule_engine, "_compile_re2", lambda value, flags: None)
+        m.setattr(rule_engine, "_compile_pcre2", lambda value, flags: None)
+        return RuleEngine(rules)
+
+
+def _spans(engine, text):
+    return [(h.rule_id, [(ev.start, ev.end) for ev in h.evidence]) for h in engine.match(text)]
+
+
+def test_re2_matches_like_re(monkeypatch):
+    pytest.importorskip("re2")
+    # RE2 reads [:digit:] inside a class as a POSIX class; re sees literal characters.
+    posix = RuleEngine([_rule("RX-010", {"patterns": [{"type": "regex", "value": "[a[:digit:]]+", "flags": ""}]})])
+    assert posix._compiled[0].patterns[0].kind != "regex_re2"
+
+    rules = [
+        _rule("RX-009", {"regex": ["login", "paypa[il1]"]}),
+        _rule("RX-011", {"patterns": [{"type": "regex", "value": "ki", "flags": ""}]}),
+    ]
+    engine = RuleEngine(rules)
+    assert {cp.kind for cr in engine._compiled for cp in cr.patterns} == {"regex_re2"}
+
+    reference = _plain_re_engine(monkeypatch, rules)
+    # re.IGNORECASE folds 'İ' and the Kelvin sign onto ASCII letters; RE2's (?i) does not.
+    for text in ["LOG\u0130N now", "login PAYPAL", "\u212Ai ki", "\u05e9\u05dc\u05d5\u05dd paypa1"]:
+        assert _spans(engine, text) == _spans(reference, text), text
+
+def test_re2_set_skips_only_patterns_that_cannot_match():
+    pytest.importorskip("re2")
+    engine = RuleEngine(
+        [
+            _rule("RX-006", {"regex": ["paypa[il1]", "acc(ou)?nt"]}),
+            _rule("RX-007", {"match": "all", "regex": ["inv[o0]ice", "paypa[il1]"]}),
+        ]
+    )
+    assert engine._re2_set is not None and len(engine._re2_set_members) == 4
+
+    hits = engine.match("PayPal account")
+    assert [h.rule_id for h in hits] == ["RX-006"]
+    assert [ev.match for ev in hits[0].evidence] == ["PayPal", "account"]
+    assert [h.rule_id for h in engine.match("PayPal inv0ice")] == ["RX-006", "RX-007"]
+    assert engine.match("nothing here") == []
+
+
+def test_pcre2_keeps_unicode_word_boundaries():
+    pytest.importorskip("pcre2")
+    engine = RuleEngine([_rule("RX-005", {"regex": [r"\b(סיסמה|password)\b", r"a\Z"]})])
+    kinds = [cp.kind for cp in engine._compiled[0].patterns]
+    assert kinds == ["regex_pcre", "regex"]
+
+    hits = engine.match("שלחו סיסמה עכשיו\na\n")
+    assert [(ev.match, ev.start) for ev in hits[0].evidence] == [("סיסמה", 5)]
+
+
+
+def test_pcre2_matches_like_re(monkeypatch):
+    pytest.importorskip("pcre2")
+    rules = [
+        _rule("RX-012", {"regex": [r"\b[a-z0-9 _.-]+\.(pdf|docx?)\.(exe|scr)\b", r"\bsign\s*in\b"]}),
+        _rule("RX-013", {"patterns": [{"type": "regex", "value": r"\S+\.exe", "flags": ""}]}),
+    ]
+    engine = RuleEngine(rules)
+    assert {cp.kind for cr in engine._compiled for cp in cr.patterns} == {"regex_pcre"}
+
+    # PCRE2, like RE2, reads [:digit:] inside a class as a POSIX class.
+    posix = RuleEngine([_rule("RX-014", {"patterns": [{"type": "regex", "value": "[a[:digit:]]+", "flags": ""}]})])
+    assert posix._compiled[0].patterns[0].kind == "regex"
+
+    reference = _plain_re_engine(monkeypatch, rules)
+    # PCRE2 does not fold 'İ'/the Kelvin sign like re.IGNORECASE, and its \s skips \x1c-\x1f.
+    texts = [
+        "\u05e7\u05d5\u05d1\u05e5: \u0130NVOICE.PDF.EXE",
+        "SIGN IN: invoice.pdf.exe",
+        "\u212Aey.pdf.exe",
+        "\x1fpayload.exe",
+    ]
+    for text in texts:
+        assert _spans(engine, text) == _spans(reference, text), text
+
+
+def test_non_ascii_case_folding_keeps_default_pack_hits(analyzer):
+    for body in ["\u05e7\u05d5\u05d1\u05e5 \u05de\u05e6\u05d5\u05e8\u05e3: \u0130NVOICE.PDF.EXE", "file: \u0130nvoice_2024.docm"]:
+        res = analyzer.analyze(body=body)
+        assert "PHISH-013" in {h.rule_id for h in res.hits}
+        assert res.score == 37
+
+
+def test_match_reuses_haystack_from_context_only_for_same_text():
+    engine = RuleEngine([_rule("KW-005", {"any_keywords": ["verify"]})])
+    text = "Please VERIFY"
+    # A stale haystack for a different text must be ignored.
+    stale = AnalysisContext(urls=[], domains=[], emails=[], phones=[], haystack="xxxxxx verify", text="other")
+    assert [ev.start for ev in engine.match(text, ctx=stale)[0].evidence] == [7]
+
+    # A haystack for the same text is trusted as-is (a doctored one proves it is reused).
+    cached = AnalysisContext(urls=[], domains=[], emails=[], phones=[], haystack="verify xxxxxx", text=text)
+    assert [ev.start for ev in engine.match(text, ctx=cached)[0].evidence] == [0]
+
+
+def test_bigram_prefilter_keeps_keyword_hits():
+    keywords = [f"decoy{i:02d}" for i in range(60)] + ["wire", "x"]
+    engine = RuleEngine([_rule("KW-006", {"any_keywords": keywords})])
+    engine._keyword_automaton = None  # force the str.find path
+    engine._use_bigram_filter = True
+
+    hits = engine.match("Send a WIRE to x")
+    assert [(ev.match, ev.start) for ev in hits[0].evidence] == [("WIRE", 7), ("x", 15)]
+
+
+def test_evidence_budget_spans_patterns_in_order():
+    engine = RuleEngine(
+        [_rule("KW-007", {"any_keywords": ["alpha", "beta"], "regex": ["gamma"]})],
+        max_evidence_per_rule=10,
+    )
+    hits = engine.match("alpha " * 8 + "beta " * 8 + "gamma " * 8)
+    matches = [ev.match for ev in hits[0].evidence]
+    assert matches == ["alpha"] * 8 + ["beta"] * 2
+
+
+def test_all_mode_keeps_one_evidence_per_pattern():
+    engine = RuleEngine([_rule("KW-008", {"match": "all", "any_keywords": ["alpha"], "regex": ["beta"]})])
+    hits = engine.match("alpha beta alpha beta")
+    assert [(ev.match, ev.start) for ev in hits[0].evidence] == [("alpha", 0), ("beta", 6)]
+
+
+def test_identical_regexes_share_a_compiled_pattern():
+    rules = [_rule("RX-006", {"regex": ["invoice-[0-9]+"]}), _rule("RX-007", {"regex": ["invoice-[0-9]+"]})]
+    first, second = RuleEngine(rules)._compiled
+    assert first.patterns[0].regex is second.patterns[0].regex
+    assert RuleEngine(rules)._compiled[0].patterns[0].regex is first.patterns[0].regex
+
+
+def test_context_rules_only_run_with_context():
+    engine = RuleEngine([_rule("KW-009", {"any_keywords": ["click"]})])
+    text = "click https://bit.ly/abc"
+    ctx = AnalysisContext(urls=["https://bit.ly/abc"], domains=["bit.ly"], emails=[], phones=[])
+
+    assert [h.rule_id for h in engine.match(text)] == ["KW-009"]
+    assert [h.rule_id for h in engine.match_with_context(text, ctx)] == ["KW-009", "CTX-URL-SHORTENER"]
+    assert [h.rule_id for h in engine.match(text, ctx=ctx)] == ["KW-009", "CTX-URL-SHORTENER"]
@@ -0,0 +1,67 @@
+"""
+Regression tests for score/severity/action aggregation.
+"""
+from app.core.scoring import (
+    build_highlights,
+    choose_action,
+    normalize_score,
+    score_to_result,
+)
+from app.core.types import Action, Evidence, RuleHit, Severity
+
+
+def _hit(rule_id: str, weight: int, severity: Severity, action: Action, start: int = 0) -> RuleHit:
+    ev = Evidence(kind="keyword", pattern="x", match="x", start=start, end=start + 1, snippet="x")
+    return RuleHit(
+        rule_id=rule_id,
+        title=f"Rule {rule_id}",
+        weight=weight,
+        severity=severity,
+        action=action,
+        explain="test",
+        evidence=[ev],
+    )
+
+
+def test_enum_ranks_follow_strictness():
+    assert [s.rank for s in (Severity.low, Severity.medium, Severity.high)] == [0, 1, 2]
+    assert Action.allow.rank < Action.report.rank < Action.verify_out_of_band.rank < Action.block.rank
+    assert Severity("high") is Severity.high and Action("report").value == "report"
+
+
+def test_choose_action_escalates_to_strongest_hit():
+    hits = [_hit("A", 1, Severity.low, Action.report), _hit("B", 1, Severity.low, Action.block)]
+    assert choose_action(Severity.low, hits) is Action.block
+    assert choose_action(Severity.high, [_hit("C", 1, Severity.low, Action.allow)]) is Action.block
+    assert choose_action(Severity.medium, []) is Action.verify_out_of_band
+
+
+def test_score_to_result_counts_each_rule_once():
+    hits = [
+        _hit("A", 10, Severity.medium, Action.verify_out_of_band, start=5),
+        _hit("A", 10, Severity.medium, Action.verify_out_of_band, start=9),
+        _hit("B", 4, Severity.high, Action.allow, start=1),
+    ]
+    res = score_to_result(hits)
+    assert res.score == normalize_score(14)
+    assert res.severity is Severity.high  # escalated by the strongest hit
+    assert res.action is Action.block
+    assert [h.rule_id for h in res.hits] == ["A", "B"]
+    assert [(hl.start, hl.rule_id) for hl in res.highlights] == [(1, "B"), (9, "A")]
+
+
+def test_normalize_score_curve():
+    assert normalize_score(-5) == 0
+    assert normalize_score(0) == 0
+    assert normalize_score(35) == 63
+    assert normalize_score(160) == 99
+    assert normalize_score(10_000) == 100
+
+
+def test_build_highlights_sorted_and_deduped():
+    ordered = [_hit("A", 1, Severity.low, Action.allow, start=0), _hit("B", 1, Severity.low, Action.allow, start=3)]
+    assert [hl.start for hl in build_highlights(ordered)] == [0, 3]
+
+    shuffled = [_hit("B", 1, Severity.low, Action.allow, start=7)] + ordered + ordered
+    out = build_highlights(shuffled)
+    assert [(hl.start, hl.rule_id) for hl in out] == [(0, "A"), (3, "B"), (7, "B")]
@@ -13,11 +13,6 @@ from app.core.analyzer import Analyzer
 class TestSmokeEngine:
     """Basic smoke tests to verify the engine works end-to-end."""
 
-    @pytest.fixture
-    def analyzer(self) -> Analyzer:
-        """Create an Analyzer instance with the default rule pack."""
-        return Analyzer()
-
     def test_analyzer_loads_successfully(self, analyzer: Analyzer) -> None:
         """Verify that the Analyzer and RuleEngine load without errors."""
         assert analyzer is not None
@@ -0,0 +1,44 @@
+from app.utils.text_norm import (
+    _CACHE_MAX_LEN,
+    _normalize_cached,
+    clear_norm_cache,
+    normalize_for_matching,
+)
+
+
+def test_zero_width_chars_become_spaces_and_text_is_lowercased():
+    text = "Pay\u200bPal\u200c Ver\u200dify\ufeff NOW"
+    out = normalize_for_matching(text)
+    assert out == "pay pal  ver ify  now"
+    assert len(out) == len(text)
+
+
+def test_empty_and_plain_text():
+    assert normalize_for_matching("") == ""
+    assert normalize_for_matching("already lower") == "already lower"
+    assert normalize_for_matching("שלום WORLD") == "שלום world"
+
+
+def test_already_normalized_text_is_returned_as_is():
+    text = "please verify your account at https://example.com"
+    assert normalize_for_matching(text) is text
+    assert normalize_for_matching("lower\u200bzw") == "lower zw"
+
+
+def test_ascii_fast_path_matches_general_path():
+    text = "Verify Your ACCOUNT at http://Example.COM now"
+    assert normalize_for_matching(text) == text.lower()
+    assert normalize_for_matching(text + "\u200b") == text.lower() + " "
+
+
+def test_short_inputs_are_cached_and_long_inputs_bypass_cache():
+    clear_norm_cache()
+    normalize_for_matching("Re: Meeting")
+    normalize_for_matching("Re: Meeting")
+    assert _normalize_cached.cache_info().hits == 1
+
+    long_text = "A" * (_CACHE_MAX_LEN + 1)
+    assert normalize_for_matching(long_text) == long_text.lower()
+    assert _normalize_cached.cache_info().currsize == 1
+    clear_norm_cache()
+    assert _normalize_cached.cache_info().currsize == 0